@@ -1,9 +1,12 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-import random
+import json
+import os
+
+from core import (
+    COHORT_LABELS, MERCHANT_MEMO, STREAMING_THRESHOLD_BYTES, CohortIndex, MerchantMemo, ResultCache, Tracer, TransactionIndex,
+    account_names, create_benford_chart, create_window_chart, load_cached_report, run_cached_pipeline,
+)
 
 # --- 1. CONFIGURATION & PAGE SETUP ---
 st.set_page_config(
@@ -104,269 +107,44 @@ st.markdown("""
 # Initialize Session State
 if "report_generated" not in st.session_state:
     st.session_state.report_generated = False
-if "report_data" not in st.session_state:
-    st.session_state.report_data = None
-
-# --- 3. AGENT LOGIC (OFFLINE-FIRST) ---
-
-class ObservationAgent:
-    def identify_fixed_obligations(self, df):
-        keywords = ['rent', 'emi', 'loan', 'insurance', 'school', 'tuition', 'premium']
-        mask = df['description'].str.contains('|'.join(keywords), case=False, na=False)
-        fixed_obligations = df[mask & (df['type'].str.lower() == 'debit')]['amount'].sum()
-        return fixed_obligations
-
-    def observe(self, file_buffer):
-        try:
-            df = pd.read_csv(file_buffer)
-            required_cols = ['date', 'description', 'amount', 'type']
-            if not all(col in df.columns for col in required_cols):
-                return {"error": "CSV must contain columns: date, description, amount, type (credit/debit)"}
-
-            df['date'] = pd.to_datetime(df['date'])
-            df = df.sort_values('date')
-            
-            def categorize(desc):
-                desc = desc.lower()
-                if 'salary' in desc: return 'Salary'
-                if 'freelance' in desc or 'client' in desc or 'upwork' in desc: return 'Freelance'
-                if 'rent' in desc or 'emi' in desc or 'loan' in desc: return 'Fixed Obligations'
-                if 'grocery' in desc or 'food' in desc or 'swiggy' in desc: return 'Lifestyle'
-                return 'Other'
-            df['category'] = df['description'].apply(categorize)
-
-            total_inflow = df[df['type'].str.lower() == 'credit']['amount'].sum()
-            total_outflow = df[df['type'].str.lower() == 'debit']['amount'].sum()
-            fixed_expenses = self.identify_fixed_obligations(df)
-            max_transaction = df['amount'].max() if not df.empty else 0
-
-            return {
-                "total_inflow": float(total_inflow),
-                "total_outflow": float(total_outflow),
-                "fixed_expenses": float(fixed_expenses),
-                "max_transaction": float(max_transaction),
-                "transaction_count": len(df),
-                "raw_df": df
-            }
-        except Exception as e:
-            return {"error": str(e)}
-
-class ReasoningAgent:
-    def __init__(self):
-        pass
-
-    def check_benford_stats(self, df):
-        try:
-            df_debits = df[df['type'].str.lower() == 'debit'].copy()
-            if len(df_debits) < 5: return None
-            df_debits = df_debits[df_debits['amount'] > 0]
-            leading_digits = df_debits['amount'].astype(str).str.lstrip(' -').str[0]
-            leading_digits = leading_digits[leading_digits.isin([str(i) for i in range(1, 10)])].astype(int)
-            counts = leading_digits.value_counts(normalize=True).sort_index()
-            for i in range(1, 10):
-                if i not in counts: counts[i] = 0.0
-            return counts
-        except: return None
-
-    def get_ai_lifestyle_profile(self, fixed, lifestyle, declared):
-        """
-        OFFLINE MODE: Simulates AI profiling using rule-based logic.
-        """
-        ratio = fixed / declared if declared > 0 else 1
-        
-        if ratio > 0.6:
-            return "Profile: **High-Leverage Living**. Fixed obligations consume >60% of declared income, suggesting potential undisclosed liquidity sources."
-        elif fixed > 20000 and lifestyle < 2000:
-            return "Profile: **Shadow Consumer**. Significant home/loan payments visible, but daily living expenses are digitally invisible (likely Cash-based)."
-        elif lifestyle > (declared * 0.5):
-            return "Profile: **Discretionary Overspender**. Lifestyle spending exceeds 50% of declared income, leaving little room for savings or taxes."
-        else:
-            return "Profile: **Balanced Digital Footprint**. Spending patterns align reasonably with declared income tiers."
-
-    def analyze(self, declared_income, observed_data):
-        signals = []
-        logs = []
-        risk_score = 0
-        df = observed_data['raw_df']
-        
-        # Calculate Percentage Difference
-        mismatch_pct = ((observed_data['total_inflow'] - declared_income) / declared_income) * 100 if declared_income > 0 else 0
-
-        # --- 1. HYPOTHESIS GENERATION ---
-        hypothesis = None
-        if mismatch_pct > 30:
-            hypothesis = "income_underreporting"
-            logs.append(f"[HYPOTHESIS] Possible income under-reporting detected. Mismatch: {mismatch_pct:.1f}%")
-        elif mismatch_pct > 10:
-            hypothesis = "mild_inconsistency"
-            logs.append(f"[HYPOTHESIS] Minor financial inconsistency detected. Mismatch: {mismatch_pct:.1f}%")
-        else:
-            hypothesis = "consistent_profile"
-            logs.append(f"[HYPOTHESIS] Profile appears consistent. Mismatch: {mismatch_pct:.1f}%")
-
-        # --- 2. EXISTING CHECKS ---
-        
-        # Income Check
-        if observed_data['total_inflow'] > declared_income * 1.2:
-            signals.append(f"Inflows exceed declaration by {mismatch_pct:.1f}%")
-            logs.append(f"[ABS_CHECK] FAIL: Observed {observed_data['total_inflow']} > Declared {declared_income}")
-            risk_score += 2
-        else:
-            logs.append("[ABS_CHECK] PASS: Inflows within threshold.")
-
-        # Lifestyle/Shadow Check
-        fixed = observed_data['fixed_expenses']
-        lifestyle = df[df['category'] == 'Lifestyle']['amount'].sum()
-        ai_profile_text = self.get_ai_lifestyle_profile(fixed, lifestyle, declared_income)
-        
-        if fixed > 10000 and lifestyle < (fixed * 0.10):
-             signals.append(f"⚠️ Digital Lifestyle Gap: High fixed bills (₹{fixed:,}) but near-zero daily spend.")
-             logs.append(f"[LIFESTYLE_GAP] FAIL: Fixed={fixed} vs Lifestyle={lifestyle}")
-             risk_score += 1
-        
-        # --- 3. CONDITIONAL SUSTAINABILITY CHECK ---
-        implied_income = 0
-        if hypothesis != "consistent_profile":
-            logs.append("[TOOL_INVOKE] Running Sustainability Check due to hypothesis.")
-            implied_income = (fixed / 0.40) if fixed > 0 else 0
-            if declared_income < implied_income:
-                 signals.append(f"Fixed costs imply income requirement of ~₹{implied_income:,.0f} (Sustainability Risk)")
-                 logs.append(f"[SUSTAINABILITY] FAIL: Declared {declared_income} < Implied {implied_income}")
-                 risk_score += 2
-        else:
-            logs.append("[TOOL_SKIP] Sustainability check skipped (profile consistent).")
-
-        # --- 4. CONDITIONAL BENFORD ANALYSIS ---
-        benford_counts = None
-        if hypothesis == "income_underreporting":
-            logs.append("[TOOL_INVOKE] Running Benford's Law Analysis due to high-risk hypothesis.")
-            benford_counts = self.check_benford_stats(df)
-            
-            if benford_counts is not None:
-                if benford_counts.get(1, 0) < 0.20:
-                    signals.append(f"⚠️ Benford's Law Violation: Digit '1' freq is {benford_counts[1]*100:.1f}%")
-                    logs.append(f"[STATISTICS] FAIL: Benford Digit 1 = {benford_counts[1]:.2f}")
-                    risk_score += 1
-                else:
-                    logs.append(f"[STATISTICS] PASS: Benford Digit 1 = {benford_counts[1]:.2f}")
-        else:
-            logs.append("[TOOL_SKIP] Benford analysis skipped (no strong hypothesis).")
-
-        # 5. Volatility (Always run as safety check)
-        max_tx = observed_data['max_transaction']
-        if max_tx > (declared_income * 0.20):
-            signals.append(f"Single large transaction (₹{max_tx:,}) detected.")
-            logs.append(f"[VOLATILITY] FAIL: Max Tx {max_tx} > 20% of Declared")
-            risk_score += 1
-
-        if risk_score >= 3: level = "High"
-        elif risk_score >= 1: level = "Medium"
-        else: level = "Low"
-        
-        return {
-            "mismatch_ratio": mismatch_pct,
-            "risk_level": level,
-            "risk_score": risk_score,
-            "signals": signals,
-            "logs": logs,
-            "benford_data": benford_counts,
-            "implied_income": implied_income,
-            "ai_profile": ai_profile_text,
-            "lifestyle_spend": lifestyle,
-            "hypothesis": hypothesis
-        }
-
-class ActionAgent:
-    def explain(self, declared, observed, reasoning):
-        """
-        OFFLINE MODE: Context-Aware Report Constructor.
-        Builds a custom narrative by analyzing specific signal combinations.
-        """
-        risk_score = reasoning['risk_score']
-        signals = reasoning['signals']
-        mismatch = reasoning['mismatch_ratio']
-        hypothesis = reasoning['hypothesis']
-        
-        # 1. ESTABLISH TONE (The "Mood" of the Agent)
-        if risk_score >= 3:
-            opening = "🚨 **Critical Alert:** The financial profile shows significant deviations that require immediate attention."
-            tone = "urgent"
-        elif risk_score >= 1:
-            opening = "⚠️ **Advisory:** Several inconsistencies were detected that may flag compliance reviews."
-            tone = "cautionary"
-        else:
-            opening = "✅ **Clearance:** The financial footprint appears healthy and consistent with the declaration."
-            tone = "reassuring"
-
-        # 2. DIAGNOSTIC NARRATIVE (The "Why")
-        narrative_parts = []
-        
-        if mismatch > 20:
-            narrative_parts.append(f"The primary driver is a **{mismatch:.0f}% discrepancy** between banking inflows and declared income.")
-        
-        if any("Benford" in s for s in signals):
-            narrative_parts.append("Furthermore, the **statistical distribution of expenses** (Benford's Law) appears unnatural, which is a common indicator of fabricated data.")
-            
-        if any("Lifestyle" in s for s in signals):
-            narrative_parts.append("A **lifestyle-income gap** was identified, where fixed obligations (Rent/EMI) disproportionately consume the declared income.")
-
-        if not narrative_parts and tone == "reassuring":
-            narrative_parts.append("Spending patterns, volume, and frequency align well with standard profiles for this income bracket.")
-
-        # Join narrative parts naturally
-        body_text = " ".join(narrative_parts)
-
-        # 3. STRATEGIC RECOMMENDATION (The "Next Steps")
-        if "income_underreporting" in str(hypothesis):
-            next_step = "**Recommended Action:** Review all revenue sources. Ensure freelance or cash-based income is fully documented to bridge the gap."
-        elif any("Benford" in s for s in signals):
-            next_step = "**Recommended Action:** Conduct a line-item audit of expense receipts. The unnatural data spread suggests potential errors in manual entry."
-        elif "mild_inconsistency" in str(hypothesis):
-             next_step = "**Recommended Action:** Re-categorize 'Transfer' and 'Self' transactions to ensure they are not falsely inflating inflow totals."
-        else:
-             next_step = "**Recommended Action:** Maintain current record-keeping practices. Periodic review of expense categorization is suggested."
-
-        # 4. FINAL ASSEMBLY
-        final_report = f"""
-        {opening}
-        
-        {body_text}
-        
-        ---
-        {next_step}
-        """
-        return final_report
-
-# --- 4. VISUALIZATION FUNCTIONS ---
-
-def create_benford_chart(counts):
-    benford_probs = {d: np.log10(1 + 1/d) for d in range(1, 10)}
-    digits = list(range(1, 10))
-    expected = [benford_probs[d] * 100 for d in digits]
-    observed = [counts.get(d, 0) * 100 for d in digits]
-    
-    fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=digits, y=observed, name='Observed Frequency',
-        marker_color='#f472b6', opacity=0.7
-    ))
-    fig.add_trace(go.Scatter(
-        x=digits, y=expected, name='Benford Expected',
-        line=dict(color='#22d3ee', width=4, dash='solid')
-    ))
-    fig.update_layout(
-        title="<b>Forensic Analysis: Benford's Law</b>",
-        xaxis_title="Leading Digit (1-9)",
-        yaxis_title="Frequency (%)",
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(255,255,255,0.05)',
-        font=dict(family="Inter", color="#cbd5e1"),
-        legend=dict(x=0.7, y=1),
-        height=400
-    )
-    return fig
-
-# --- 5. NAVIGATION & RENDER LOGIC ---
+if "report_key" not in st.session_state:
+    st.session_state.report_key = None
+if "report_pinned" not in st.session_state:
+    st.session_state.report_pinned = None
+
+# --- 3. NAVIGATION & RENDER LOGIC ---
+
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+@st.cache_resource
+def get_cohort_index():
+    # Peer baselines built with `batch.py --build-cohorts`, if configured.
+    path = os.environ.get("VERITAX_COHORTS")
+    return CohortIndex.load(path) if path else None
+
+@st.cache_resource
+def get_merchant_memo():
+    # Merchant memo saved by `batch.py --merchant-memo`, if configured.
+    path = os.environ.get("VERITAX_MERCHANTS")
+    if path and os.path.exists(path):
+        MERCHANT_MEMO.update(MerchantMemo.load(path).entries)
+    return MERCHANT_MEMO
+
+def get_session_report():
+    """
+    The current session's report, read from the shared cache. Resets the
+    session if the entry has been evicted in the meantime.
+    """
+    if st.session_state.report_pinned is not None:
+        return st.session_state.report_pinned
+    data = load_cached_report(get_result_cache(), st.session_state.report_key)
+    if data is None and st.session_state.report_generated:
+        st.session_state.report_generated = False
+        st.session_state.report_key = None
+        st.warning("This analysis has expired from the shared cache. Please run it again.")
+    return data
 
 def render_sidebar():
     with st.sidebar:
@@ -389,43 +167,78 @@ def render_sidebar():
 
         st.markdown("### ⚙️ Parameters")
         declared = st.number_input("Declared Annual Income (₹)", value=500000, step=10000)
+        st.radio("Fixed obligations", ["keywords", "recurring"], key="obligation_source", horizontal=True,
+                 format_func={"keywords": "Keyword match", "recurring": "Recurring detection"}.get,
+                 help="Recurring detection finds periodic debits with stable amounts to the same merchant.")
+        st.checkbox("Trace memory per stage (slower)", key="trace_memory")
         
         return page_mode, analysis_view, declared
 
+def render_spans(records):
+    if not records:
+        st.caption("No stage timings recorded.")
+        return
+    depth = {}
+    rows = []
+    for rec in records:
+        depth[rec["span_id"]] = depth.get(rec["parent_id"], -1) + 1
+        rows.append({
+            "Stage": " " * depth[rec["span_id"]] + rec["name"],
+            "Wall (ms)": round(rec["wall_ms"], 2),
+            "CPU (ms)": round(rec["cpu_ms"], 2),
+            "Rows": rec["rows"],
+            "Peak (MB)": round(rec["peak_bytes"] / 1e6, 2) if rec["peak_bytes"] is not None else None,
+        })
+    st.dataframe(pd.DataFrame(rows).astype({"Rows": "Int64"}), hide_index=True, use_container_width=True)
+    st.download_button("Export spans (JSON)", json.dumps(records, indent=2, default=str), file_name="veritax_spans.json", mime="application/json")
+
 def render_dashboard(analysis_view, declared_income):
     st.markdown("### 📊 Financial Consistency Dashboard")
     st.write("")
     
+    run_btn = False
     if not st.session_state.report_generated:
         c1, c2 = st.columns([3, 1])
-        uploaded_file = c1.file_uploader("Upload CSV", type=["csv"], label_visibility="collapsed")
+        uploaded_files = c1.file_uploader("Upload CSV", type=["csv", "arrow", "feather"], accept_multiple_files=True, label_visibility="collapsed",
+                                          help="Upload one statement per bank account; transfers between them are not counted as income. "
+                                               "A statement saved by batch.py --statement-cache (.arrow) loads without parsing.")
         run_btn = c2.button("🚀 INITIALIZE AGENTS", type="primary", use_container_width=True)
 
-        if run_btn and uploaded_file:
-            observer = ObservationAgent()
-            reasoner = ReasoningAgent()
-            actor = ActionAgent()
-
+        if run_btn and uploaded_files:
+            if len(uploaded_files) == 1:
+                statement = uploaded_files[0].getvalue()
+            else:
+                statement = dict(zip(account_names(uploaded_files), (f.getvalue() for f in uploaded_files)))
+            get_merchant_memo()
             with st.spinner("🔮 Veritax Agents are analyzing financial patterns..."):
-                obs_data = observer.observe(uploaded_file)
-                if "error" in obs_data:
-                    st.error(obs_data["error"])
+                with Tracer(memory=st.session_state.get("trace_memory", False)) as tracer:
+                    report_key, result = run_cached_pipeline(
+                        get_result_cache(), statement, declared_income,
+                        streaming=sum(f.size for f in uploaded_files) > STREAMING_THRESHOLD_BYTES, tracer=tracer,
+                        obligations=st.session_state.get("obligation_source", "keywords"),
+                        cohorts=get_cohort_index()
+                    )
+                if "error" in result:
+                    st.error(result["error"])
                 else:
-                    reasoning_data = reasoner.analyze(declared_income, obs_data)
-                    explanation = actor.explain(declared_income, obs_data, reasoning_data)
-                    st.session_state.report_data = {"obs": obs_data, "reasoning": reasoning_data, "explanation": explanation, "declared": declared_income}
+                    st.session_state.report_key = report_key
+                    # Larger than the whole cache budget: keep it with this session only.
+                    if load_cached_report(get_result_cache(), report_key) is None:
+                        st.session_state.report_pinned = result
                     st.session_state.report_generated = True
                     st.rerun()
 
-    if st.session_state.report_generated:
+    data = get_session_report() if st.session_state.report_generated else None
+    if data is not None:
         if st.button("🔄 Start New Analysis"):
             st.session_state.report_generated = False
-            st.session_state.report_data = None
+            st.session_state.report_key = None
+            st.session_state.report_pinned = None
             st.rerun()
 
-        data = st.session_state.report_data
         r_data = data['reasoning']
         obs = data['obs']
+        render_tracer = Tracer()
 
         # KPI Header
         kpi1, kpi2, kpi3, kpi4 = st.columns(4)
@@ -436,6 +249,15 @@ def render_dashboard(analysis_view, declared_income):
             lvl = r_data['risk_level']
             cls = f"badge-{lvl.lower()}"
             st.markdown(f"<div style='text-align: center; padding-top: 10px;'><div class='risk-badge {cls}'>{lvl.upper()} RISK</div></div>", unsafe_allow_html=True)
+        transfers = obs.get('transfers')
+        if transfers is not None and len(transfers):
+            with st.expander(f"🔀 {len(transfers)} transfers between {len(obs['accounts'])} accounts (₹{transfers['amount'].sum():,.0f}) excluded from inflow and outflow"):
+                st.dataframe(transfers, hide_index=True, use_container_width=True)
+        if obs.get('duplicates_removed'):
+            st.caption(f"{obs['duplicates_removed']:,} transactions repeated across overlapping exports were counted once.")
+        if r_data.get('cohort_percentiles'):
+            st.caption(f"Peers ({r_data['cohort']}): " + " · ".join(
+                f"{COHORT_LABELS[name]} p{p * 100:.0f}" for name, p in r_data['cohort_percentiles'].items() if p == p))
         st.divider()
 
         # --- VIEW: REASONING AGENT ---
@@ -453,25 +275,48 @@ def render_dashboard(analysis_view, declared_income):
             if r_data['benford_data'] is not None:
                 st.markdown("#### 🔎 Statistical Forensics (Benford's Law)")
                 st.caption("Agent invoked forensic analysis due to high-risk hypothesis.")
-                st.plotly_chart(create_benford_chart(r_data['benford_data']), use_container_width=True)
-                if r_data['benford_data'].get(1, 0) < 0.20:
+                st.plotly_chart(create_benford_chart(r_data['benford_data'], tracer=render_tracer), use_container_width=True)
+                fd = r_data['benford_tests']['first_digit']
+                ftd = r_data['benford_tests']['first_two_digits']
+                b1, b2, b3 = st.columns(3)
+                b1.metric("MAD (1st digit)", f"{fd['mad']:.4f}", help=f"Conformity: {fd['conformity']}")
+                b2.metric("Chi² (1st digit)", f"{fd['chi2']:.1f}", help=f"5% critical value: {fd['chi2_critical']}")
+                b3.metric("MAD (1st two digits)", f"{ftd['mad']:.4f}", help=f"Conformity: {ftd['conformity']}")
+                if r_data['benford_data'].first_digit_frequencies()[1] < 0.20:
                      st.error("⚠️ **Violation Detected:** Leading digit '1' frequency is unnaturally low.")
                 else:
                      st.success("✅ Data Distribution appears natural.")
             else:
                 st.info("ℹ️ **Statistical Analysis Skipped:** Agent determined profile risk was too low to warrant expensive forensic compute.")
 
+            monthly = obs.get('monthly')
+            if monthly is not None and len(monthly) > 1:
+                st.divider()
+                st.markdown("#### 📈 Time-Window Analysis")
+                st.caption("Monthly series checked for spikes against the trailing 6 months, sustained shifts, and clusters of credits just below reporting limits.")
+                st.plotly_chart(create_window_chart(monthly, obs['anomalies'], tracer=render_tracer), use_container_width=True)
+                if len(obs['anomalies']):
+                    st.dataframe(obs['anomalies'], hide_index=True, use_container_width=True, column_config={
+                        "value": st.column_config.NumberColumn("Value", format="%.0f"),
+                        "baseline": st.column_config.NumberColumn("Baseline", format="%.0f"),
+                        "score": st.column_config.NumberColumn("Score (z / shift / count)", format="%.2f"),
+                    })
+
             st.divider()
             st.markdown("#### 📝 Reasoning Trace Log (Agent Thinking)")
-            st.caption("Live decision logic from the probabilistic engine.")
-            log_text = "\n".join(r_data['logs'])
-            st.markdown(f'<div class="console-text">{log_text}</div>', unsafe_allow_html=True)
+            st.caption("Live decision logic from the probabilistic engine, with the cost of each stage.")
+            log_col, span_col = st.columns([3, 2])
+            with log_col:
+                log_text = "\n".join(r_data['logs'])
+                st.markdown(f'<div class="console-text">{log_text}</div>', unsafe_allow_html=True)
+            with span_col:
+                render_spans(data.get('trace', []) + render_tracer.records())
         
         # --- VIEW: LIFESTYLE LOGIC ---
         elif analysis_view == "Lifestyle Logic":
             st.markdown("## 🏡 Lifestyle & Shadow Economy Analysis")
             
-            fixed = obs['fixed_expenses']
+            fixed = r_data.get('fixed_expenses', obs['fixed_expenses'])
             implied = r_data['implied_income']
             
             # Simulated AI Profile (Rule-Based)
@@ -503,6 +348,18 @@ def render_dashboard(analysis_view, declared_income):
             if fixed > 10000 and (obs['total_outflow'] - fixed) < (fixed * 0.1):
                 st.warning(f"**Digital Lifestyle Gap Detected:** The user pays ₹{fixed:,} in bills but has near-zero daily living expenses.")
 
+            streams = obs.get('obligations')
+            if streams is not None and len(streams):
+                st.markdown("### 🔁 Recurring Obligations")
+                st.caption("Periodic debits to the same merchant with stable amounts"
+                           + (" (used for the checks above)." if r_data.get('obligation_source') == "recurring" else "."))
+                st.dataframe(streams, hide_index=True, use_container_width=True, column_config={
+                    "typical_amount": st.column_config.NumberColumn("Typical (₹)", format="%.0f"),
+                    "annualized_cost": st.column_config.NumberColumn("Annualized (₹)", format="%.0f"),
+                    "total": st.column_config.NumberColumn("Total paid (₹)", format="%.0f"),
+                    "period_days": st.column_config.NumberColumn("Period (days)", format="%.0f"),
+                })
+
         # --- VIEW: SYSTEM AGENT ---
         elif analysis_view == "System Agent":
             st.markdown("## 💬 System Interpretation")
@@ -511,18 +368,90 @@ def render_dashboard(analysis_view, declared_income):
     elif not run_btn:
         st.info("👈 Waiting for input... Please upload a bank statement.")
 
+def get_transaction_index(data):
+    """
+    The Inspector's TransactionIndex for the current report, built on first
+    use and shared through the result cache like the statement it indexes.
+    """
+    cache = get_result_cache()
+    key = f"{data['obs_key']}:index"
+    index = cache.peek(key)
+    if index is None:
+        pinned = st.session_state.get("inspector_index")
+        if pinned is not None and pinned[0] == key:
+            return pinned[1]
+        index = cache.put(key, TransactionIndex(data['obs']['raw_df']))
+        # Larger than the whole cache budget: keep it with this session only.
+        st.session_state.inspector_index = (key, index) if cache.peek(key) is None else None
+    return index
+
 def render_inspector():
     st.subheader("🔎 Transaction Inspector")
-    if st.session_state.report_generated:
-        df = st.session_state.report_data['obs']['raw_df']
-        st.dataframe(df, use_container_width=True, height=600)
-    else:
+    data = get_session_report() if st.session_state.report_generated else None
+    if data is None:
         st.warning("Please run analysis first.")
+        return
+    if data['obs']['raw_df'] is None:
+        st.info("This statement was analyzed in streaming mode, so individual transactions were not kept in memory.")
+        return
+
+    index = get_transaction_index(data)
+    first_date, last_date, min_amount, max_amount = index.bounds()
+    with st.expander("Filters", expanded=False):
+        c1, c2, c3 = st.columns(3)
+        date_range = None
+        if first_date is not None:
+            picked = c1.date_input("Date range", (first_date.date(), last_date.date()),
+                                   min_value=first_date.date(), max_value=last_date.date())
+            if len(picked) == 2 and picked != (first_date.date(), last_date.date()):
+                date_range = (pd.Timestamp(picked[0]), pd.Timestamp(picked[1]) + pd.Timedelta(days=1))
+        low = c2.number_input("Min amount (₹)", value=min_amount, min_value=min_amount, max_value=max_amount)
+        high = c3.number_input("Max amount (₹)", value=max_amount, min_value=min_amount, max_value=max_amount)
+        amount_range = (low, high) if (low, high) != (min_amount, max_amount) else None
+        c1, c2, c3 = st.columns(3)
+        categories = c1.multiselect("Category", index.labels('category')) or None
+        types = c2.multiselect("Type", index.labels('type')) or None
+        search = c3.text_input("Description contains").strip() or None
+
+    c1, c2, c3, c4 = st.columns([2, 1, 1, 1])
+    sort_by = c2.selectbox("Sort by", TransactionIndex.SORT_KEYS)
+    descending = c3.toggle("Descending")
+    page_size = c4.selectbox("Rows per page", [50, 100, 250, 500], index=1)
+
+    filters = (date_range, amount_range, categories, types, search, sort_by, descending, page_size)
+    if st.session_state.get("inspector_filters") != filters:
+        st.session_state.inspector_filters = filters
+        st.session_state.inspector_page = 1
+    positions = index.query(date_range, amount_range, categories, types, search, sort_by, descending)
+    pages = max(1, -(-len(positions) // page_size))
+    page = c1.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, key="inspector_page")
+
+    st.dataframe(index.page(positions, page - 1, page_size), use_container_width=True, height=600)
+    shown_from = (page - 1) * page_size
+    st.caption(f"Rows {min(shown_from + 1, len(positions)):,}–{min(shown_from + page_size, len(positions)):,} "
+               f"of {len(positions):,} matching ({len(index):,} in statement)")
 
 def render_arch():
     st.subheader("⚙️ System Architecture")
     st.markdown("VeritaxAI operates on a localized, privacy-first multi-agent protocol.")
 
+    st.markdown("#### 🗄️ Shared Result Cache")
+    stats = get_result_cache().stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Entries", stats["entries"])
+    c2.metric("Hit Rate", f"{stats['hit_rate']*100:.0f}%")
+    c3.metric("Memory", f"{stats['bytes']/1e6:.1f} MB")
+    c4.metric("Evictions", stats["evictions"] + stats["expirations"])
+    st.caption(f"{stats['hits']} hits / {stats['misses']} misses · budget {stats['max_bytes']/1e6:.0f} MB")
+
+    st.markdown("#### 🏷️ Merchant Memo")
+    stats = get_merchant_memo().stats()
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Entries", stats["entries"])
+    c2.metric("Hit Rate", f"{stats['hit_rate']*100:.0f}%")
+    c3.metric("Evictions", stats["evictions"])
+    st.caption(f"{stats['hits']} hits / {stats['misses']} misses · capacity {stats['max_entries']:,} entries")
+
 def main():
     page_mode, analysis_view, declared = render_sidebar()
     if page_mode == "Dashboard":
@@ -0,0 +1,569 @@
+"""
+VeritaxAI headless batch scorer.
+
+Runs ObservationAgent -> ReasoningAgent -> ActionAgent over many statements
+in a process pool and writes one row per taxpayer to a CSV, Parquet or Arrow
+IPC (.arrow / .feather) file.
+
+    python batch.py statements/ --declared-income 500000 -o season.parquet
+    python batch.py manifest.csv -o season.csv --workers 8
+
+A manifest is a CSV with columns `path`, `declared_income` and optionally
+`taxpayer_id` (defaults to the file name without extension). Relative paths
+are resolved against the manifest's directory. A taxpayer_id listed on
+several rows (one per bank account) is scored once over all its statements,
+with overlapping exports deduplicated and transfers between the accounts
+excluded; its declared_income is taken from the first row.
+
+Every finished statement is appended to `<output>.journal.jsonl`. Re-running
+the same command skips taxpayers already scored successfully, so an
+interrupted run picks up where it stopped. Use --fresh to start over.
+
+Rules can be re-applied to a finished run with new thresholds, without
+reading any statement again:
+
+    python batch.py season.parquet --rescore --thresholds strict.json -o strict.parquet
+
+Monitored taxpayers can be re-scored incrementally: with --state-dir, each
+taxpayer's aggregate state is kept in `<state-dir>/<taxpayer_id>.json` and
+only rows added since the last run are read and folded in.
+
+    python batch.py manifest.csv -o march.csv --state-dir state/
+
+With --graph, the run also builds a transfer graph across all taxpayers from
+counterparties named in descriptions (taxpayer ids, or `;`-separated
+`aliases` in the manifest) and adds circular-flow signals and risk points;
+see network.py.
+
+Peer baselines: a finished run can be turned into a cohort index (declared-
+income bracket, split by the manifest's optional `region` column), and later
+runs or rescores flag taxpayers in the top 1% of their cohort.
+
+    python batch.py season.parquet --build-cohorts -o cohorts/2025
+    python batch.py manifest.csv -o march.csv --cohorts cohorts/2025
+
+Statements screened repeatedly (with other declared incomes or thresholds)
+can skip parsing: with --statement-cache, each parsed statement is saved to
+`<dir>/<taxpayer_id>.arrow` and memory-mapped by later runs for as long as
+the CSV is unchanged, so workers reading it share its pages. A manifest may
+also list .arrow statements directly.
+
+    python batch.py manifest.csv -o march.arrow --statement-cache parsed/
+
+Descriptions are normalized to canonical merchant keys through a memo
+(core.MerchantMemo); --merchant-memo keeps it in a JSON file between runs,
+adding the merchants each run learns.
+
+    python batch.py manifest.csv -o march.csv --merchant-memo merchants.json
+
+With --trace, per-stage timings for every statement are appended to a JSONL
+file of OpenTelemetry-style spans (add --trace-memory for peak memory).
+"""
+import argparse
+import json
+import os
+import sys
+import textwrap
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from core import (COLUMNAR_EXTENSIONS, MERCHANT_MEMO, NETWORK_COLUMNS, NULL_TRACER, POPULATION_COLUMNS, SIGNAL_FLAGS,
+                  WINDOW_COLUMNS, ActionAgent, CohortIndex, MerchantMemo, ObservationAgent, ReasoningAgent, TaxpayerState,
+                  Tracer, decode_signals, peer_outlier_signal, read_columnar, statement_is_current, summary_features,
+                  write_columnar)
+from network import build_directory, edge_block, network_features, normalize_alias, read_edges, statement_edges
+
+RESULT_COLUMNS = [
+    "taxpayer_id", "path", "declared_income", "status", "error",
+    "risk_level", "risk_score", "mismatch_ratio", "hypothesis", "signals",
+    "signal_mask", "implied_income", "lifestyle_spend", "total_inflow",
+    "total_outflow", "fixed_expenses", "max_transaction", "transaction_count",
+    "debit_count", "benford_digit_one", "benford_mad", *WINDOW_COLUMNS, "explanation", "elapsed_sec",
+]
+
+# --- 1. INPUT DISCOVERY ---
+
+def load_tasks(source, declared_income=None):
+    """
+    Returns a list of (taxpayer_id, path, declared_income) tuples from either
+    a directory of statement CSVs or a manifest CSV. For a taxpayer with
+    several manifest rows, `path` is a tuple of their paths.
+    """
+    if os.path.isdir(source):
+        if declared_income is None:
+            raise ValueError("--declared-income is required when scoring a directory")
+        names = sorted(n for n in os.listdir(source) if n.lower().endswith(".csv"))
+        return [(os.path.splitext(n)[0], os.path.join(source, n), float(declared_income)) for n in names]
+
+    manifest = pd.read_csv(source)
+    missing = {"path", "declared_income"} - set(manifest.columns)
+    if missing:
+        raise ValueError(f"Manifest must contain columns: path, declared_income (missing {', '.join(sorted(missing))})")
+    base_dir = os.path.dirname(os.path.abspath(source))
+    tasks = {}
+    for row in manifest.itertuples(index=False):
+        path = row.path if os.path.isabs(row.path) else os.path.join(base_dir, row.path)
+        taxpayer_id = getattr(row, "taxpayer_id", None)
+        if taxpayer_id is None or pd.isna(taxpayer_id):
+            taxpayer_id = os.path.splitext(os.path.basename(row.path))[0]
+        taxpayer_id = str(taxpayer_id)
+        if taxpayer_id in tasks:
+            _, paths, declared = tasks[taxpayer_id]
+            tasks[taxpayer_id] = (taxpayer_id, (paths if isinstance(paths, tuple) else (paths,)) + (path,), declared)
+        else:
+            tasks[taxpayer_id] = (taxpayer_id, path, float(row.declared_income))
+    return list(tasks.values())
+
+def load_aliases(source, tasks):
+    """
+    Per task, the counterparty aliases from the manifest's optional
+    `aliases` column (`;`-separated, all rows of a taxpayer combined).
+    """
+    aliases = {task[0]: [] for task in tasks}
+    if os.path.isdir(source):
+        return [aliases[task[0]] for task in tasks]
+    manifest = pd.read_csv(source)
+    if "aliases" in manifest.columns and "taxpayer_id" in manifest.columns:
+        for taxpayer_id, value in zip(manifest["taxpayer_id"].astype(str), manifest["aliases"]):
+            if taxpayer_id in aliases and isinstance(value, str):
+                aliases[taxpayer_id].extend(a for a in value.split(";") if a.strip())
+    return [aliases[task[0]] for task in tasks]
+
+def load_regions(source):
+    """
+    {taxpayer_id: region} from the manifest's optional `region` column, or
+    None if there is none.
+    """
+    if os.path.isdir(source):
+        return None
+    manifest = pd.read_csv(source)
+    if "region" not in manifest.columns or "taxpayer_id" not in manifest.columns:
+        return None
+    regions = manifest.dropna(subset=["region"]).drop_duplicates("taxpayer_id")
+    return dict(zip(regions["taxpayer_id"].astype(str), regions["region"].astype(str)))
+
+# --- 2. WORKER ---
+
+_AGENTS = None
+_CHUNKSIZE = None
+_TRACE = None
+_STATE_DIR = None
+_DIRECTORY = None
+_LEARN_MERCHANTS = False
+_STATEMENT_CACHE = None
+
+def _init_worker(chunksize=None, thresholds=None, trace=None, state_dir=None, directory=None, merchants=None,
+                 statement_cache=None):
+    """
+    `trace` is None (off), "time" or "memory". With a counterparty
+    `directory` (network.build_directory), transfer edges are extracted.
+    With `merchants` (merchant memo entries), the worker's memo starts from
+    them and each row reports the merchants learned since the last one.
+    With a `statement_cache` directory, parsed statements are kept there.
+    """
+    global _AGENTS, _CHUNKSIZE, _TRACE, _STATE_DIR, _DIRECTORY, _LEARN_MERCHANTS, _STATEMENT_CACHE
+    _AGENTS = (ObservationAgent(), ReasoningAgent(thresholds), ActionAgent())
+    _CHUNKSIZE = chunksize
+    _TRACE = trace
+    _STATE_DIR = state_dir
+    _DIRECTORY = directory
+    _LEARN_MERCHANTS = merchants is not None
+    _STATEMENT_CACHE = statement_cache
+    if merchants:
+        MERCHANT_MEMO.update(merchants)
+
+def _set_tracer(tracer):
+    for agent in _AGENTS:
+        agent.tracer = tracer
+
+def _path_label(path):
+    return os.pathsep.join(path) if isinstance(path, tuple) else path
+
+def score_statement(task):
+    """
+    Runs the full agent pipeline for one statement. Never raises: failures
+    are reported in the returned row with status "error".
+    """
+    if _AGENTS is None:
+        _init_worker()
+    observer, reasoner, actor = _AGENTS
+    taxpayer_id, path, declared = task
+    row = {"taxpayer_id": taxpayer_id, "path": _path_label(path), "declared_income": declared, "status": "ok", "error": None}
+    tracer = Tracer(memory=_TRACE == "memory") if _TRACE else NULL_TRACER
+    _set_tracer(tracer)
+    start = time.perf_counter()
+    state = None
+    try:
+        if isinstance(path, tuple):
+            # Multi-account taxpayers are always observed in full.
+            obs = observer.observe_accounts(path)
+        elif _STATE_DIR:
+            state_path = os.path.join(_STATE_DIR, f"{taxpayer_id}.json")
+            obs, state = observer.observe_increment(path, TaxpayerState.load(state_path))
+        elif _STATEMENT_CACHE:
+            cached = os.path.join(_STATEMENT_CACHE, f"{taxpayer_id}.arrow")
+            if statement_is_current(cached, path):
+                obs = observer.observe(cached)
+            else:
+                obs = observer.observe(path)
+                if "error" not in obs:
+                    observer.save(obs, cached, source=path)
+        else:
+            obs = observer.observe_stream(path, chunksize=_CHUNKSIZE) if _CHUNKSIZE else observer.observe(path)
+        if "error" in obs:
+            raise ValueError(obs["error"])
+        reasoning = reasoner.analyze(declared, obs)
+        features = summary_features(obs["summary"])
+        row.update({
+            "risk_level": reasoning["risk_level"],
+            "risk_score": int(reasoning["risk_score"]),
+            "mismatch_ratio": float(reasoning["mismatch_ratio"]),
+            "hypothesis": reasoning["hypothesis"],
+            "signals": json.dumps(reasoning["signals"], ensure_ascii=False),
+            "signal_mask": int(reasoning["signal_mask"]),
+            "implied_income": float(reasoning["implied_income"]),
+            "lifestyle_spend": features["lifestyle_spend"],
+            "total_inflow": obs["total_inflow"],
+            "total_outflow": obs["total_outflow"],
+            "fixed_expenses": obs["fixed_expenses"],
+            "max_transaction": obs["max_transaction"],
+            "transaction_count": int(obs["transaction_count"]),
+            "debit_count": features["debit_count"],
+            "benford_digit_one": features["benford_digit_one"],
+            "benford_mad": features["benford_mad"],
+            "explanation": textwrap.dedent(actor.explain(declared, obs, reasoning)).strip(),
+        })
+        # Empty only for incremental runs on states saved before time windows were kept.
+        row.update(obs.get("window_features") or {})
+        if state is not None:
+            state.save(state_path)
+        if _DIRECTORY is not None:
+            index = _DIRECTORY[normalize_alias(taxpayer_id)]
+            row["_edges"] = edge_block(index, statement_edges(obs["raw_df"], _DIRECTORY, index))
+    except Exception as e:
+        row["status"] = "error"
+        row["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        tracer.close()
+        _set_tracer(NULL_TRACER)
+    row["elapsed_sec"] = time.perf_counter() - start
+    if tracer.enabled:
+        row["_spans"] = tracer.to_otel(taxpayer_id=taxpayer_id, path=row["path"])
+    if _LEARN_MERCHANTS:
+        row["_merchants"] = MERCHANT_MEMO.drain_learned()
+    return row
+
+# --- 3. JOURNAL (RESUME SUPPORT) ---
+
+def read_journal(journal_path):
+    """
+    Returns {taxpayer_id: row} for every row recorded so far. A truncated
+    trailing line from a killed run is ignored.
+    """
+    done = {}
+    if not os.path.exists(journal_path):
+        return done
+    with open(journal_path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[row["taxpayer_id"]] = row
+    return done
+
+def _ends_mid_line(path):
+    with open(path, "rb") as fh:
+        if fh.seek(0, os.SEEK_END) == 0:
+            return False
+        fh.seek(-1, os.SEEK_END)
+        return fh.read(1) != b"\n"
+
+def write_output(rows, output_path, columns=RESULT_COLUMNS):
+    df = pd.DataFrame(rows).reindex(columns=columns)
+    if output_path.lower().endswith(".parquet"):
+        df.to_parquet(output_path, index=False)
+    elif output_path.lower().endswith(COLUMNAR_EXTENSIONS):
+        write_columnar(df, output_path)
+    else:
+        df.to_csv(output_path, index=False)
+    return df
+
+# --- 4. SCHEDULER ---
+
+def _run_isolated(task, chunksize=None, thresholds=None, trace=None, state_dir=None, directory=None, merchants=None,
+                  statement_cache=None):
+    """
+    Re-runs a task that was in flight when a worker died, in its own
+    single-process pool, so one crashing statement can't take others down.
+    """
+    try:
+        with ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(chunksize, thresholds, trace, state_dir, directory, merchants, statement_cache)) as pool:
+            return pool.submit(score_statement, task).result()
+    except BrokenProcessPool:
+        taxpayer_id, path, declared = task
+        return {"taxpayer_id": taxpayer_id, "path": _path_label(path), "declared_income": declared,
+                "status": "error", "error": "Worker process crashed", "elapsed_sec": None}
+
+def run_batch(tasks, journal_path, workers=None, chunksize=None, thresholds=None, on_row=None,
+              trace_path=None, trace_memory=False, state_dir=None, directory=None, edges_path=None, merchant_memo=None,
+              statement_cache=None):
+    """
+    Scores `tasks` across a process pool, appending each finished row to the
+    journal as soon as it completes. Keeps at most a few tasks per worker in
+    flight so memory stays flat for very large seasons. A `chunksize`
+    switches workers to streaming ingest for statements larger than memory.
+    With `trace_path`, each statement's spans are appended there as JSONL.
+    With `state_dir`, statements are folded into per-taxpayer saved state
+    (see ObservationAgent.observe_increment) instead of read in full. With
+    a counterparty `directory`, each statement's transfer edges are
+    appended to `edges_path`. Workers start from `merchant_memo` (a
+    MerchantMemo), which collects the merchants they learn. With a
+    `statement_cache` directory, parsed statements are saved there and
+    reused while their CSV is unchanged.
+    """
+    trace = ("memory" if trace_memory else "time") if trace_path else None
+    merchants = dict(merchant_memo.entries) if merchant_memo is not None else None
+    workers = workers or os.cpu_count() or 1
+    pending = list(reversed(tasks))
+    max_in_flight = workers * 4
+
+    with open(journal_path, "a", encoding="utf-8") as journal, \
+            open(trace_path or os.devnull, "a", encoding="utf-8") as trace_file, \
+            open(edges_path or os.devnull, "ab") as edges_file:
+        if _ends_mid_line(journal_path):
+            # A killed run's partial row must not swallow the next one.
+            journal.write("\n")
+        def record(row):
+            for span in row.pop("_spans", ()):
+                trace_file.write(json.dumps(span, ensure_ascii=False) + "\n")
+            # Edges go first: a taxpayer missing from the journal is re-run
+            # and its newer edge block supersedes this one.
+            edges_file.write(row.pop("_edges", b""))
+            edges_file.flush()
+            learned = row.pop("_merchants", None)
+            if learned and merchant_memo is not None:
+                merchant_memo.update(learned)
+            journal.write(json.dumps(row, ensure_ascii=False) + "\n")
+            journal.flush()
+            if on_row:
+                on_row(row)
+
+        while pending:
+            suspects = []
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(chunksize, thresholds, trace, state_dir, directory, merchants, statement_cache)) as pool:
+                in_flight = {}
+                try:
+                    while pending or in_flight:
+                        while pending and len(in_flight) < max_in_flight:
+                            task = pending.pop()
+                            in_flight[pool.submit(score_statement, task)] = task
+                        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            row = future.result()
+                            del in_flight[future]
+                            record(row)
+                except BrokenProcessPool:
+                    suspects = list(in_flight.values())
+            for task in suspects:
+                record(_run_isolated(task, chunksize, thresholds, trace, state_dir, directory, merchants, statement_cache))
+
+# --- 5. TRANSFER GRAPH ---
+
+def apply_network(results, features, thresholds=None):
+    """
+    Adds NETWORK_COLUMNS (`features`, indexed by taxpayer_id) to batch
+    results and applies the circular-flow rule to rows scored ok: 2 more
+    risk points, its signal, and the risk level re-derived from the score.
+    """
+    results = results.drop(columns=[c for c in NETWORK_COLUMNS if c in results.columns]).join(features, on="taxpayer_id")
+    reasoner = ReasoningAgent(thresholds)
+    hit = reasoner.circular_flow(results) & (results["status"] == "ok").to_numpy()
+    texts = [f"Circular Flow: ₹{flow:,.0f} returns through {count} cycle(s) of related taxpayers"
+             for flow, count in zip(results.loc[hit, "circular_flow"], results.loc[hit, "cycle_count"])]
+    return _add_signal(results, hit, 2, "circular_flow", texts, reasoner.thresholds)
+
+def _add_signal(results, hit, points, flag, texts, t):
+    # Adds a population-level rule's points, mask bit and signal texts to the `hit` rows.
+    if hit.any():
+        score = results.loc[hit, "risk_score"].to_numpy(dtype=np.int64) + points
+        results.loc[hit, "risk_score"] = score
+        results.loc[hit, "risk_level"] = np.where(score >= t['high_score'], "High", np.where(score >= t['medium_score'], "Medium", "Low"))
+        results.loc[hit, "signal_mask"] = results.loc[hit, "signal_mask"].to_numpy(dtype=np.int64) | SIGNAL_FLAGS[flag]
+        results.loc[hit, "signals"] = [json.dumps(json.loads(signals) + [text], ensure_ascii=False)
+                                       for signals, text in zip(results.loc[hit, "signals"], texts)]
+    return results
+
+def score_network(results, tasks, edges_path, thresholds=None):
+    """
+    Builds the transfer graph from the run's edge file and applies it to
+    `results` (see apply_network).
+    """
+    features = network_features(read_edges(edges_path), len(tasks))
+    features.index = pd.Index([task[0] for task in tasks], name="taxpayer_id")
+    return apply_network(results, features, thresholds)
+
+# --- 6. COHORT BASELINES ---
+
+def build_cohorts(results):
+    """
+    CohortIndex over the rows of a batch output scored ok, split by region
+    when the output has a `region` column.
+    """
+    ok = results[results["status"] == "ok"]
+    regions = None
+    if "region" in ok.columns and ok["region"].notna().any():
+        regions = ok["region"].astype(object).where(ok["region"].notna(), "unknown").to_numpy()
+    return CohortIndex.build(ok, regions)
+
+def apply_cohorts(results, cohorts, thresholds=None):
+    """
+    Applies the peer-outlier rule to rows scored ok: 1 more risk point and a
+    signal naming the metrics in the tail of the taxpayer's cohort.
+    """
+    reasoner = ReasoningAgent(thresholds, cohorts=cohorts)
+    ok = (results["status"] == "ok").to_numpy()
+    percentiles, rows = reasoner.cohort_percentiles(results[ok])
+    outliers = reasoner.cohort_outliers(percentiles)
+    flagged = outliers.any(axis=1).to_numpy()
+    hit = np.zeros(len(results), dtype=bool)
+    hit[np.flatnonzero(ok)[flagged]] = True
+    texts = [peer_outlier_signal(p, outliers.columns[o], reasoner.cohorts.label(row))
+             for p, o, row in zip(percentiles[flagged].to_dict("records"), outliers[flagged].to_numpy(), rows[flagged])]
+    return _add_signal(results, hit, 1, "cohort_outlier", texts, reasoner.thresholds)
+
+# --- 7. RESCORING ---
+
+def read_output(path):
+    if path.lower().endswith(COLUMNAR_EXTENSIONS):
+        return read_columnar(path)[0]
+    return pd.read_parquet(path) if path.lower().endswith(".parquet") else pd.read_csv(path)
+
+def rescore(results, thresholds=None, cohorts=None):
+    """
+    Re-applies the risk rules to a previous batch output in one vectorized
+    call, including circular flow if the output has NETWORK_COLUMNS, the
+    time-window rules for rows with WINDOW_COLUMNS, and peer outliers given a
+    CohortIndex. Signals are reported by rule name; the narrative is not
+    rebuilt.
+    """
+    results = results.copy()
+    ok = results["status"] == "ok"
+    columns = POPULATION_COLUMNS + [c for c in NETWORK_COLUMNS + WINDOW_COLUMNS + ["benford_mad", "region"] if c in results.columns]
+    scored = ReasoningAgent(thresholds, cohorts=cohorts).analyze_population(results.loc[ok, columns])
+    for column in scored.columns:
+        results.loc[ok, column] = scored[column]
+    results.loc[ok, "signals"] = [json.dumps(decode_signals(mask)) for mask in scored["signal_mask"]]
+    results.loc[ok, "explanation"] = None
+    return results
+
+def load_thresholds(path):
+    if path is None:
+        return None
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+# --- 8. CLI ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="VeritaxAI batch risk scoring")
+    parser.add_argument("source", help="Directory of statement CSVs, a manifest CSV, or (with --rescore) a previous output")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.csv, .parquet, or .arrow / .feather)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--declared-income", type=float, default=None, help="Declared income applied to every statement in a directory")
+    parser.add_argument("--chunksize", type=int, default=None, help="Stream each statement in chunks of this many rows")
+    parser.add_argument("--fresh", action="store_true", help="Ignore any previous partial run and start over")
+    parser.add_argument("--thresholds", default=None, help="JSON file overriding ReasoningAgent thresholds")
+    parser.add_argument("--rescore", action="store_true", help="Re-apply the rules to a previous output instead of reading statements")
+    parser.add_argument("--trace", default=None, help="Append per-stage spans (OpenTelemetry-style JSONL) to this file")
+    parser.add_argument("--trace-memory", action="store_true", help="Also record peak memory per stage in --trace (slower)")
+    parser.add_argument("--state-dir", default=None, help="Keep per-taxpayer aggregate state here and only read rows added since the last run")
+    parser.add_argument("--graph", action="store_true", help="Score circular flows across taxpayers from a transfer graph of the whole run")
+    parser.add_argument("--cohorts", default=None, help="Cohort index (from --build-cohorts) to flag peer outliers against")
+    parser.add_argument("--statement-cache", default=None, help="Save parsed statements here and memory-map them on later runs")
+    parser.add_argument("--merchant-memo", default=None, help="JSON merchant memo to start from and update with the merchants this run learns")
+    parser.add_argument("--build-cohorts", action="store_true", help="Build a cohort index at --output from a previous output")
+    args = parser.parse_args(argv)
+    if args.graph and (args.chunksize or args.state_dir):
+        parser.error("--graph needs full statements; it can't be combined with --chunksize or --state-dir")
+    if args.statement_cache and (args.chunksize or args.state_dir):
+        parser.error("--statement-cache keeps full statements; it can't be combined with --chunksize or --state-dir")
+    thresholds = load_thresholds(args.thresholds)
+    cohorts = CohortIndex.load(args.cohorts) if args.cohorts else None
+
+    if args.build_cohorts:
+        start = time.perf_counter()
+        index = build_cohorts(read_output(args.source))
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        index.save(args.output)
+        print(f"[BATCH] Built {len(index.keys)} cohorts from {index.sizes[index.lookup[('*', '*')]]} taxpayers "
+              f"in {time.perf_counter() - start:.2f}s. Index: {args.output}.npy", file=sys.stderr)
+        return 0
+
+    if args.rescore:
+        start = time.perf_counter()
+        df = rescore(read_output(args.source), thresholds, cohorts)
+        write_output(df.to_dict("records"), args.output, RESULT_COLUMNS + [c for c in NETWORK_COLUMNS + ["region"] if c in df.columns])
+        print(f"[BATCH] Rescored {len(df)} taxpayers in {time.perf_counter() - start:.2f}s. Output: {args.output}", file=sys.stderr)
+        return 0
+
+    tasks = load_tasks(args.source, args.declared_income)
+    journal_path = args.output + ".journal.jsonl"
+    edges_path = args.output + ".edges" if args.graph else None
+    if args.fresh:
+        for path in (journal_path, edges_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    done = read_journal(journal_path)
+    todo = [t for t in tasks if done.get(t[0], {}).get("status") != "ok"]
+    print(f"[BATCH] {len(tasks)} statements, {len(tasks) - len(todo)} already scored, {len(todo)} to run", file=sys.stderr)
+
+    for path in (args.state_dir, args.statement_cache):
+        if path:
+            os.makedirs(path, exist_ok=True)
+    directory = build_directory([t[0] for t in tasks], load_aliases(args.source, tasks)) if args.graph else None
+    merchant_memo = None
+    if args.merchant_memo:
+        merchant_memo = MerchantMemo.load(args.merchant_memo) if os.path.exists(args.merchant_memo) else MerchantMemo()
+    start = time.perf_counter()
+    run_batch(todo, journal_path, workers=args.workers, chunksize=args.chunksize, thresholds=thresholds,
+              trace_path=args.trace, trace_memory=args.trace_memory, state_dir=args.state_dir,
+              directory=directory, edges_path=edges_path, merchant_memo=merchant_memo, statement_cache=args.statement_cache)
+    elapsed = time.perf_counter() - start
+    if merchant_memo is not None:
+        merchant_memo.save(args.merchant_memo)
+
+    done = read_journal(journal_path)
+    rows = [done[t[0]] for t in tasks if t[0] in done]
+    columns = list(RESULT_COLUMNS)
+    regions = load_regions(args.source)
+    if regions is not None:
+        rows = [{**row, "region": regions.get(row["taxpayer_id"])} for row in rows]
+        columns.append("region")
+    if args.graph or cohorts is not None:
+        df = pd.DataFrame(rows).reindex(columns=columns)
+        if args.graph:
+            graph_start = time.perf_counter()
+            df = score_network(df, tasks, edges_path, thresholds)
+            flagged = int((df["signal_mask"].fillna(0).astype(np.int64) & SIGNAL_FLAGS["circular_flow"]).astype(bool).sum())
+            print(f"[BATCH] Transfer graph in {time.perf_counter() - graph_start:.1f}s: {flagged} taxpayers with circular flow", file=sys.stderr)
+            columns += NETWORK_COLUMNS
+        if cohorts is not None:
+            df = apply_cohorts(df, cohorts, thresholds)
+            flagged = int((df["signal_mask"].fillna(0).astype(np.int64) & SIGNAL_FLAGS["cohort_outlier"]).astype(bool).sum())
+            print(f"[BATCH] {flagged} taxpayers in the top {ReasoningAgent(thresholds).thresholds['cohort_tail']:.0%} of their cohort", file=sys.stderr)
+        rows = df.to_dict("records")
+    df = write_output(rows, args.output, columns)
+    failed = int((df["status"] != "ok").sum())
+    rate = len(todo) / elapsed if elapsed > 0 else 0.0
+    print(f"[BATCH] Done in {elapsed:.1f}s ({rate:.1f} statements/sec). {failed} failed. Output: {args.output}", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+VeritaxAI pipeline benchmarks.
+
+Times and memory-profiles every pipeline stage separately on synthetic
+statements (see synthetic.py) and writes the results as JSON, so runs from
+different versions can be compared.
+
+    python benchmark.py --sizes 1000,100000,1000000 -o bench.json
+    python benchmark.py --sizes 1000,100000 -o new.json --compare bench.json
+
+Wall time is the best of --repeat runs without tracing; peak memory comes
+from one extra run under tracemalloc. Every run also records the cold start
+of a headless scoring worker: a fresh interpreter importing core and scoring
+the sample statement. NumPy and pandas report into
+tracemalloc, but Arrow-backed string buffers do not, so string-heavy stages
+are under-counted.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from core import ActionAgent, ObservationAgent, ReasoningAgent, create_benford_chart
+from synthetic import generate_statement
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+SAMPLE_STATEMENT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_bank_statement.csv")
+
+COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from core import ActionAgent, ObservationAgent, ReasoningAgent
+imported = time.perf_counter()
+obs = ObservationAgent().observe(sys.argv[1])
+reasoning = ReasoningAgent().analyze(500000.0, obs)
+ActionAgent().explain(500000.0, obs, reasoning)
+done = time.perf_counter()
+print(json.dumps({"import_sec": imported - start, "first_score_sec": done - imported,
+                  "ui_modules_loaded": sorted(m for m in ("streamlit", "plotly") if m in sys.modules)}))
+"""
+
+def _measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds_min": min(times), "seconds_median": float(np.median(times)), "peak_bytes": int(peak)}
+
+def bench_size(rows, repeat=3, seed=0):
+    """
+    Benchmarks each stage on one statement of `rows` rows with inflated
+    inflows and Benford-violating amounts injected, so the conditional tools
+    (Benford, sustainability) actually run.
+    """
+    df, declared = generate_statement(rows, seed=seed, fraud=("inflated_inflows", "benford_violation"))
+    csv_bytes = df.to_csv(index=False).encode()
+    observer, reasoner, actor = ObservationAgent(), ReasoningAgent(), ActionAgent()
+
+    obs = observer.observe(io.BytesIO(csv_bytes))
+    reasoning = reasoner.analyze(declared, obs)
+    benford = reasoner.check_benford_stats(obs["raw_df"])
+
+    stages = {
+        "observe": lambda: observer.observe(io.BytesIO(csv_bytes)),
+        "observe_stream": lambda: observer.observe_stream(io.BytesIO(csv_bytes)),
+        "analyze": lambda: reasoner.analyze(declared, obs),
+        "check_benford_stats": lambda: reasoner.check_benford_stats(obs["raw_df"]),
+        "explain": lambda: actor.explain(declared, obs, reasoning),
+        "create_benford_chart": lambda: create_benford_chart(benford),
+    }
+    results = []
+    for stage, fn in stages.items():
+        record = {"stage": stage, "rows": len(df), **_measure(fn, repeat)}
+        record["rows_per_sec"] = len(df) / record["seconds_min"] if record["seconds_min"] > 0 else None
+        results.append(record)
+        print(f"  {stage:<22} {len(df):>10,} rows  {record['seconds_min']*1000:10.2f} ms  {record['peak_bytes']/1e6:9.1f} MB", file=sys.stderr)
+    return results
+
+def cold_start(repeat=5):
+    """
+    Best-of-`repeat` cold start of a scoring worker, each in a new
+    interpreter: total process time, time to import core, and time to score
+    the sample statement once imported.
+    """
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", COLD_START_SCRIPT, SAMPLE_STATEMENT], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+        runs.append({"process_sec": time.perf_counter() - start, **json.loads(out.strip().splitlines()[-1])})
+    best = min(runs, key=lambda r: r["process_sec"])
+    print(f"  cold start: {best['process_sec']*1000:.0f} ms process, {best['import_sec']*1000:.0f} ms import, "
+          f"{best['first_score_sec']*1000:.0f} ms first score", file=sys.stderr)
+    return best
+
+def environment():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        revision = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": revision,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def compare(current, baseline):
+    """
+    Prints the time and memory ratio (current / baseline) for every stage
+    and size present in both runs.
+    """
+    base = {(r["stage"], r["rows"]): r for r in baseline["results"]}
+    print(f"{'stage':<22} {'rows':>10}  {'time x':>8}  {'mem x':>8}")
+    for r in current["results"]:
+        b = base.get((r["stage"], r["rows"]))
+        if b is None:
+            continue
+        t = r["seconds_min"] / b["seconds_min"] if b["seconds_min"] else float("nan")
+        m = r["peak_bytes"] / b["peak_bytes"] if b["peak_bytes"] else float("nan")
+        print(f"{r['stage']:<22} {r['rows']:>10,}  {t:8.2f}  {m:8.2f}")
+    if "cold_start" in current and "cold_start" in baseline:
+        t = current["cold_start"]["process_sec"] / baseline["cold_start"]["process_sec"]
+        print(f"{'cold_start':<22} {'':>10}  {t:8.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark VeritaxAI pipeline stages")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="Comma-separated statement sizes in rows")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="bench.json")
+    parser.add_argument("--compare", default=None, help="Previous JSON output to compare against")
+    args = parser.parse_args(argv)
+
+    results = []
+    for rows in (int(s) for s in args.sizes.split(",") if s):
+        print(f"[BENCH] {rows:,} rows", file=sys.stderr)
+        results.extend(bench_size(rows, repeat=args.repeat, seed=args.seed))
+
+    print("[BENCH] worker cold start", file=sys.stderr)
+    report = {"environment": environment(), "cold_start": cold_start(), "results": results}
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"[BENCH] Wrote {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            compare(report, json.load(fh))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""
+VeritaxAI cross-taxpayer transfer graph.
+
+ReasoningAgent sees one taxpayer at a time, so money cycled between related
+parties looks like ordinary income to each of them. This batch stage links
+the taxpayers of one run through the transfers in their statements and finds
+flows that come back to where they started.
+
+    python batch.py manifest.csv -o season.parquet --graph
+
+Counterparties are resolved from transaction descriptions: any token equal
+to a taxpayer_id (or one of the manifest's optional `aliases`, e.g. account
+numbers or UPI handles) links the two taxpayers. Each worker reduces its
+statement to one edge per counterparty and direction, which the scheduler
+appends to `<output>.edges` as fixed-size binary records (EDGE_DTYPE). The
+graph is then held as CSR arrays: connected components come from a
+vectorized union-find, and cycles of up to MAX_CYCLE_LENGTH taxpayers are
+enumerated over the part of the graph that can lie on a cycle by joining
+frontiers of paths grown forward and backward from each start node.
+"""
+import os
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from core import NETWORK_COLUMNS, TYPE_LABELS
+
+EDGE_DTYPE = np.dtype([("src", "<i4"), ("dst", "<i4"), ("paise", "<i8"), ("side", "i1")])
+# `side` of an edge record: which statement reported the transfer.
+DEBIT_SIDE, CREDIT_SIDE = 0, 1
+MAX_CYCLE_LENGTH = 4
+MAX_CYCLES = 1_000_000
+# Start nodes per cycle-search batch are chosen so their two-hop paths stay under this.
+CYCLE_BATCH_PATHS = 2_000_000
+
+TOKEN_PATTERN = re.compile(r"[A-Z0-9@._-]+")
+
+# --- 1. COUNTERPARTY RESOLUTION ---
+
+def normalize_alias(alias):
+    return str(alias).strip().upper()
+
+def build_directory(taxpayer_ids, aliases=None):
+    """
+    {token: taxpayer index} for resolving counterparties. Every taxpayer is
+    known by its id plus, optionally, `aliases[i]` (an iterable of strings).
+    """
+    directory = {}
+    for i, taxpayer_id in enumerate(taxpayer_ids):
+        directory[normalize_alias(taxpayer_id)] = i
+        for alias in (aliases[i] if aliases is not None else ()):
+            if alias:
+                directory[normalize_alias(alias)] = i
+    return directory
+
+def resolve_counterparties(descriptions, directory):
+    """
+    Taxpayer index named in each description (the first matching token), or
+    -1. Each distinct description is tokenized once.
+    """
+    codes, uniques = pd.factorize(pd.Series(descriptions))
+    resolved = np.full(len(uniques) + 1, -1, dtype=np.int32)
+    for i, text in enumerate(uniques):
+        for token in TOKEN_PATTERN.findall(str(text).upper()):
+            index = directory.get(token)
+            if index is not None:
+                resolved[i] = index
+                break
+    return resolved[codes]
+
+def statement_edges(raw_df, directory, taxpayer):
+    """
+    The transfer edges in one statement (the compact frame from observe),
+    summed per counterparty and direction: debits are taxpayer ->
+    counterparty, credits counterparty -> taxpayer.
+    """
+    counterparty = resolve_counterparties(raw_df['description'], directory)
+    types = np.asarray(pd.Categorical(raw_df['type'], categories=TYPE_LABELS).codes)
+    if 'amount_paise' in raw_df.columns:
+        paise = raw_df['amount_paise'].to_numpy(np.int64)
+    else:
+        paise = np.round(raw_df['amount'].to_numpy(dtype=float) * 100).astype(np.int64)
+    linked = (counterparty >= 0) & (counterparty != taxpayer) & (types > 0)
+    if not linked.any():
+        return np.empty(0, dtype=EDGE_DTYPE)
+    sums = pd.Series(paise[linked]).groupby([counterparty[linked], types[linked]]).sum()
+    other = sums.index.get_level_values(0).to_numpy(np.int32)
+    debit = sums.index.get_level_values(1).to_numpy() == TYPE_LABELS.index("debit")
+    edges = np.empty(len(sums), dtype=EDGE_DTYPE)
+    edges["src"] = np.where(debit, taxpayer, other)
+    edges["dst"] = np.where(debit, other, taxpayer)
+    edges["paise"] = sums.to_numpy()
+    edges["side"] = np.where(debit, DEBIT_SIDE, CREDIT_SIDE)
+    return edges
+
+# --- 2. EDGE STORE ---
+
+def edge_block(taxpayer, edges):
+    """
+    Bytes appended to the edge file for one scored statement: a marker
+    record (dst -1) naming the taxpayer, then its edges.
+    """
+    marker = np.zeros(1, dtype=EDGE_DTYPE)
+    marker["src"], marker["dst"] = taxpayer, -1
+    return marker.tobytes() + edges.tobytes()
+
+def read_edges(path):
+    """
+    All edge records in `path`. A truncated final record is ignored, and if
+    a taxpayer's block was written more than once (a run resumed after a
+    crash), only its last block counts.
+    """
+    if not os.path.exists(path):
+        return np.empty(0, dtype=EDGE_DTYPE)
+    count = os.path.getsize(path) // EDGE_DTYPE.itemsize
+    records = np.fromfile(path, dtype=EDGE_DTYPE, count=count)
+    marker = records["dst"] == -1
+    block = np.cumsum(marker) - 1
+    owner = records["src"][marker][block]
+    last = pd.Series(block).groupby(owner).transform("max").to_numpy()
+    return records[~marker & (block == last)]
+
+# --- 3. GRAPH ---
+
+class TransferGraph:
+    """
+    Directed taxpayer graph in CSR form: the successors of node i are
+    indices[indptr[i]:indptr[i + 1]] with transfer totals in `weights`
+    (rupees). A transfer reported by both statements is counted once.
+    """
+    def __init__(self, src, dst, weights, n):
+        self.n = n
+        self.src = np.asarray(src, dtype=np.int32)
+        self.indices = np.asarray(dst, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=float)
+        if (self.src[1:] < self.src[:-1]).any():
+            order = np.argsort(self.src, kind="stable")
+            self.src, self.indices, self.weights = self.src[order], self.indices[order], self.weights[order]
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(self.src, minlength=n))]).astype(np.int64)
+
+    @classmethod
+    def from_edges(cls, edges, n):
+        if not len(edges):
+            return cls([], [], [], n)
+        key = (edges["src"].astype(np.int64) * n + edges["dst"]) * 2 + edges["side"]
+        order = np.argsort(key)
+        key = key[order]
+        starts = np.flatnonzero(np.concatenate([[True], key[1:] != key[:-1]]))
+        per_side = np.add.reduceat(edges["paise"][order], starts)
+        # Sum per side, then take the larger side: a transfer seen by both ends isn't doubled.
+        pair = key[starts] // 2
+        first = np.flatnonzero(np.concatenate([[True], pair[1:] != pair[:-1]]))
+        totals = np.maximum.reduceat(per_side, first)
+        return cls(pair[first] // n, pair[first] % n, totals / 100, n)
+
+    @property
+    def edge_count(self):
+        return len(self.indices)
+
+    def nbytes(self):
+        return self.src.nbytes + self.indices.nbytes + self.weights.nbytes + self.indptr.nbytes
+
+    def components(self):
+        """
+        Connected-component label (its smallest node) per node, ignoring
+        direction. Union-find with all edges hooked per round: each root is
+        pointed at the smallest root it touches, then paths are compressed.
+        """
+        parent = np.arange(self.n, dtype=np.int64)
+        src, dst = self.src, self.indices
+        while True:
+            a, b = parent[src], parent[dst]
+            split = a != b
+            if not split.any():
+                return parent
+            np.minimum.at(parent, np.maximum(a[split], b[split]), np.minimum(a[split], b[split]))
+            while True:
+                grand = parent[parent]
+                if (grand == parent).all():
+                    break
+                parent = grand
+
+    def cyclic_nodes(self):
+        """
+        Bool mask of nodes that can lie on a cycle: what remains after
+        peeling off, frontier by frontier, every node that no edge from a
+        remaining node reaches, and then every node that reaches none.
+        """
+        alive = np.ones(self.n, dtype=bool)
+        _peel(self.indptr, self.indices, np.bincount(self.indices, minlength=self.n), alive)
+        order = np.argsort(self.indices, kind="stable")
+        live = alive[self.src] & alive[self.indices]
+        reverse_indptr = np.concatenate([[0], np.cumsum(np.bincount(self.indices, minlength=self.n))])
+        _peel(reverse_indptr, self.src[order], np.bincount(self.src[live], minlength=self.n), alive)
+        return alive
+
+    def cycles(self, max_length=MAX_CYCLE_LENGTH, max_cycles=MAX_CYCLES):
+        """
+        Simple directed cycles of 2 to `max_length` nodes, each found once
+        (from its smallest node), in batches: yields (nodes, bottleneck)
+        with `nodes` an (k, length) array of cycles and `bottleneck` the
+        smallest transfer on each. A cycle of L nodes is a path of
+        ceil(L / 2) hops out of its start joined with one of the remaining
+        hops back into it, both over nodes above the start. Stops with a
+        RuntimeWarning once `max_cycles` have been yielded.
+        """
+        candidate = self.cyclic_nodes()
+        live = candidate[self.src] & candidate[self.indices]
+        forward = TransferGraph(self.src[live], self.indices[live], self.weights[live], self.n)
+        backward = TransferGraph(forward.indices, forward.src, forward.weights, self.n)
+        starts = np.flatnonzero(candidate)
+        # Two-hop paths out of and into each start, to size the batches.
+        work = np.cumsum((_two_hop(forward) + _two_hop(backward))[starts]) // CYCLE_BATCH_PATHS
+        found = 0
+        for batch in np.split(starts, np.flatnonzero(np.diff(work)) + 1):
+            out, into = [_paths(forward, batch)], [_paths(backward, batch)]
+            for length in range(2, max_length + 1):
+                hops = (length + 1) // 2
+                if len(out) < hops:
+                    out.append(_extend(forward, *out[-1]))
+                if len(into) < length - hops:
+                    into.append(_extend(backward, *into[-1]))
+                nodes, bottleneck = _join(out[hops - 1], into[length - hops - 1], self.n)
+                if found + len(nodes) > max_cycles:
+                    warnings.warn(f"stopped after {max_cycles} cycles; cycle counts and circular flow are partial",
+                                  RuntimeWarning, stacklevel=2)
+                    yield nodes[:max_cycles - found], bottleneck[:max_cycles - found]
+                    return
+                found += len(nodes)
+                if len(nodes):
+                    yield nodes, bottleneck
+
+def _two_hop(graph):
+    # Per node, the number of two-hop paths out of it.
+    return np.bincount(graph.src, weights=np.diff(graph.indptr)[graph.indices], minlength=graph.n)
+
+def _paths(graph, starts):
+    """
+    One-hop paths from each of `starts` to a node above it: (nodes, flow),
+    nodes an (k, 2) array of [start, node] rows, flow the transfer.
+    """
+    owner, step = _edges_of(graph.indptr, starts)
+    nodes = np.column_stack([starts[owner], graph.indices[step]])
+    keep = nodes[:, 1] > nodes[:, 0]
+    return nodes[keep], graph.weights[step][keep]
+
+def _extend(graph, nodes, flow):
+    # The paths one hop longer, still simple and above their start.
+    owner, step = _edges_of(graph.indptr, nodes[:, -1])
+    nodes = np.column_stack([nodes[owner], graph.indices[step]])
+    keep = (nodes[:, -1] > nodes[:, 0]) & (nodes[:, 1:-1] != nodes[:, -1:]).all(axis=1)
+    return nodes[keep], np.minimum(flow[owner], graph.weights[step])[keep]
+
+def _join(out, into, n):
+    """
+    Cycles closing the forward paths `out` with the backward paths `into`
+    (grown over reversed edges, so each row reads start, ..., meeting
+    node) that share their start and last node and nothing in between.
+    """
+    (head, head_flow), (tail, tail_flow) = out, into
+    head_key = head[:, 0].astype(np.int64) * n + head[:, -1]
+    tail_key = tail[:, 0].astype(np.int64) * n + tail[:, -1]
+    order = np.argsort(tail_key, kind="stable")
+    first = np.searchsorted(tail_key[order], head_key, side="left")
+    counts = np.searchsorted(tail_key[order], head_key, side="right") - first
+    left = np.repeat(np.arange(len(head)), counts)
+    right = order[np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())]
+    # Cycle: the forward path, then the backward path's inner nodes from the meeting node back.
+    nodes = np.column_stack([head[left], tail[right][:, -2:0:-1]])
+    inner_head, inner_tail = head[left][:, 1:-1], tail[right][:, 1:-1]
+    keep = (inner_head[:, :, None] != inner_tail[:, None, :]).all(axis=(1, 2))
+    return nodes[keep], np.minimum(head_flow[left], tail_flow[right])[keep]
+
+def _edges_of(indptr, nodes):
+    # (position in `nodes`, edge index) for every edge out of `nodes`.
+    starts, lengths = indptr[nodes], indptr[nodes + 1] - indptr[nodes]
+    owner = np.repeat(np.arange(len(nodes)), lengths)
+    return owner, np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + np.arange(lengths.sum())
+
+def _gather(indptr, indices, nodes):
+    # Concatenated CSR rows of `nodes`.
+    return indices[_edges_of(indptr, nodes)[1]]
+
+def _peel(indptr, indices, degree, alive):
+    """
+    Kahn-style peeling: clears `alive` for nodes whose `degree` (edges from
+    live nodes) is zero, decrementing their neighbours' degree, until none
+    are left. Each round only touches the edges of the current frontier.
+    """
+    frontier = np.flatnonzero(alive & (degree == 0))
+    while len(frontier):
+        alive[frontier] = False
+        neighbours, counts = np.unique(_gather(indptr, indices, frontier), return_counts=True)
+        degree[neighbours] -= counts
+        frontier = neighbours[alive[neighbours] & (degree[neighbours] == 0)]
+
+def network_features(edges, n, max_length=MAX_CYCLE_LENGTH, max_cycles=MAX_CYCLES):
+    """
+    NETWORK_COLUMNS per taxpayer index (0..n-1): size of the connected
+    component, number of cycles through the taxpayer, and circular flow,
+    the summed bottleneck of those cycles capped at the taxpayer's inflow
+    from other taxpayers in the run.
+    """
+    graph = TransferGraph.from_edges(edges, n)
+    labels = graph.components()
+    cycle_count = np.zeros(n, dtype=np.int64)
+    flow = np.zeros(n)
+    for nodes, bottleneck in graph.cycles(max_length, max_cycles):
+        cycle_count += np.bincount(nodes.ravel(), minlength=n)
+        flow += np.bincount(nodes.ravel(), weights=np.repeat(bottleneck, nodes.shape[1]), minlength=n)
+    received = np.bincount(graph.indices, weights=graph.weights, minlength=n)
+    return pd.DataFrame({
+        "component_size": np.bincount(labels, minlength=n)[labels],
+        "cycle_count": cycle_count,
+        "circular_flow": np.minimum(flow, received),
+    }, columns=NETWORK_COLUMNS)
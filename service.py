@@ -0,0 +1,394 @@
+"""
+VeritaxAI local scoring service.
+
+A small asyncio HTTP server for systems that need risk scores synchronously.
+Statements are parsed in a process pool, and requests that arrive together
+are scored in one vectorized ReasoningAgent.analyze_population call. It uses
+only the standard library plus the app's own dependencies, listens on
+localhost by default and never makes outbound connections.
+
+    python service.py --port 8765 --workers 4
+
+    curl -X POST --data-binary @statement.csv \\
+         "http://127.0.0.1:8765/score?declared_income=500000&taxpayer_id=T1"
+    curl -X POST -H "Content-Type: application/json" \\
+         -d '{"path": "T1.csv", "declared_income": 500000}' http://127.0.0.1:8765/score
+    curl http://127.0.0.1:8765/health
+
+A /score response holds the vectorized `score` (with its decoded
+`signals`), the `observed` totals and, unless `explain=0` is passed, the
+ActionAgent narrative (`explanation`) built from that score. Path requests
+are only accepted with --data-dir, and only for files inside it.
+
+When more than --max-pending requests are in the service, new ones are
+rejected at once with 503 and a Retry-After header instead of queueing
+without bound.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import textwrap
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from batch import load_thresholds
+from core import (MERCHANT_MEMO, POPULATION_COLUMNS, WINDOW_COLUMNS, ActionAgent, MerchantMemo, ObservationAgent, ReasoningAgent,
+                  decode_signals, summary_features)
+
+LATENCY_WINDOW = 2048
+HEADER_TIMEOUT_SECONDS = 30
+STATUS_TEXT = {
+    200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 422: "Unprocessable Entity",
+    500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+# --- 1. WORKER ---
+
+_AGENTS = None
+
+def _init_worker(thresholds=None, cohorts=None, merchant_memo=None):
+    global _AGENTS
+    _AGENTS = (ObservationAgent(), ReasoningAgent(thresholds, cohorts=cohorts), ActionAgent())
+    if merchant_memo:
+        MERCHANT_MEMO.update(MerchantMemo.load(merchant_memo).entries)
+
+def observe_summary(source):
+    """
+    Parses one statement (CSV bytes or a path) into its StatementSummary
+    and time-window results ("summary", "anomalies", "window_features").
+    Rows are streamed, so memory stays bounded for very large uploads.
+    """
+    if _AGENTS is None:
+        _init_worker()
+    buffer = io.BytesIO(source) if isinstance(source, bytes) else source
+    obs = _AGENTS[0].observe_stream(buffer)
+    if "error" in obs:
+        raise ValueError(obs["error"])
+    return {k: obs[k] for k in ("summary", "anomalies", "window_features")}
+
+def score_batch(items):
+    """
+    Scores a micro-batch of (declared_income, observed, explain) items with
+    one vectorized analyze_population call. The narrative is built from each
+    scored row's signal bits, so no item is re-analyzed on the scalar path.
+    """
+    if _AGENTS is None:
+        _init_worker()
+    _, reasoner, actor = _AGENTS
+    population = pd.DataFrame([{"declared_income": declared, **summary_features(obs["summary"]), **obs["window_features"]}
+                               for declared, obs, _ in items], columns=POPULATION_COLUMNS + ["benford_mad"] + WINDOW_COLUMNS)
+    scored = reasoner.analyze_population(population)
+    results = []
+    for (declared, obs, explain), row in zip(items, scored.to_dict("records")):
+        observed = obs["summary"].to_observed()
+        result = {
+            "score": {**row, "signals": decode_signals(row["signal_mask"])},
+            "observed": {**{k: v for k, v in observed.items() if k not in ("summary", "raw_df")}, **obs["window_features"]},
+        }
+        if explain:
+            result["explanation"] = textwrap.dedent(actor.explain(declared, observed, row)).strip()
+        results.append(result)
+    return results
+
+# --- 2. MICRO-BATCHING & BACKPRESSURE ---
+
+class Overloaded(Exception):
+    pass
+
+class ScoringService:
+    """
+    Parses each request in the process pool as soon as a parse slot is
+    free, then hands its summary to a batcher that, while other parses are
+    still in flight, waits up to `batch_wait_ms` for more and scores up to
+    `max_batch` of them in one pool call. At most `max_pending` requests are
+    accepted at a time.
+    """
+    def __init__(self, workers=None, max_batch=32, batch_wait_ms=50, max_pending=256, thresholds=None, cohorts=None,
+                 merchant_memo=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait_ms / 1000
+        self.max_pending = max_pending
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(thresholds, cohorts, merchant_memo))
+        self.parse_slots = asyncio.Semaphore(self.workers * 2)
+        self.queue = asyncio.Queue()
+        self.pending = 0
+        self.waiting_parse = 0
+        self.parsing = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.batch_sizes = deque(maxlen=LATENCY_WINDOW)
+        self.counts = {"requests": 0, "ok": 0, "errors": 0, "rejected": 0, "batches": 0, "batched_items": 0}
+        self.started = time.monotonic()
+        self._batcher = None
+        self._scoring = set()
+
+    def start(self):
+        self._batcher = asyncio.get_running_loop().create_task(self._run_batcher())
+
+    async def close(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    async def score(self, source, declared_income, explain=True):
+        if self.pending >= self.max_pending:
+            self.counts["rejected"] += 1
+            raise Overloaded(f"{self.pending} requests in progress")
+        self.pending += 1
+        self.counts["requests"] += 1
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            self.waiting_parse += 1
+            try:
+                await self.parse_slots.acquire()
+            finally:
+                self.waiting_parse -= 1
+            self.parsing += 1
+            try:
+                observed = await loop.run_in_executor(self.pool, observe_summary, source)
+            finally:
+                self.parsing -= 1
+                self.parse_slots.release()
+            future = loop.create_future()
+            await self.queue.put(((declared_income, observed, explain), future))
+            result = await future
+            self.counts["ok"] += 1
+            return result
+        except Exception:
+            self.counts["errors"] += 1
+            raise
+        finally:
+            self.pending -= 1
+            self.latencies.append(time.perf_counter() - start)
+
+    async def _run_batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.max_batch:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                # Nothing left to parse means nothing more will join this batch.
+                timeout = deadline - loop.time()
+                if timeout <= 0 or not (self.parsing or self.waiting_parse):
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = loop.create_task(self._score(batch))
+            self._scoring.add(task)
+            task.add_done_callback(self._scoring.discard)
+
+    async def _score(self, batch):
+        self.counts["batches"] += 1
+        self.counts["batched_items"] += len(batch)
+        self.batch_sizes.append(len(batch))
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self.pool, score_batch, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def metrics(self):
+        latencies = np.fromiter(self.latencies, dtype=float)
+        percentile = lambda q: float(np.percentile(latencies, q) * 1000) if len(latencies) else None
+        sizes = np.fromiter(self.batch_sizes, dtype=float)
+        return {
+            "status": "ok",
+            "uptime_sec": time.monotonic() - self.started,
+            "workers": self.workers,
+            "queue_depth": self.waiting_parse + self.queue.qsize(),
+            "in_progress": self.pending,
+            "max_pending": self.max_pending,
+            "latency_ms": {"p50": percentile(50), "p99": percentile(99), "window": len(latencies)},
+            "mean_batch_size": self.counts["batched_items"] / self.counts["batches"] if self.counts["batches"] else None,
+            "batch_size": {
+                "mean": float(sizes.mean()) if len(sizes) else None,
+                "p50": float(np.percentile(sizes, 50)) if len(sizes) else None,
+                "max": int(sizes.max()) if len(sizes) else None,
+                "window": len(sizes),
+                "max_batch": self.max_batch,
+                "wait_ms": self.batch_wait * 1000,
+            },
+            **self.counts,
+        }
+
+# --- 3. HTTP ---
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+class HttpError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+class ScoringServer:
+    """
+    Minimal HTTP/1.1 front end (one request per connection) for a
+    ScoringService.
+    """
+    def __init__(self, service, max_body_bytes=256 * 1024 * 1024, data_dir=None):
+        self.service = service
+        self.max_body_bytes = max_body_bytes
+        self.data_dir = os.path.realpath(data_dir) if data_dir else None
+
+    async def handle(self, reader, writer):
+        status, payload, headers = 500, {"error": "Internal error"}, {}
+        try:
+            method, target, request_headers = await asyncio.wait_for(self._read_head(reader), HEADER_TIMEOUT_SECONDS)
+            body = await self._read_body(reader, request_headers)
+            status, payload = await self.route(method, urlsplit(target), request_headers, body)
+        except HttpError as e:
+            status, payload, headers = e.status, {"error": str(e)}, e.headers
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            status, payload = 400, {"error": f"Malformed request: {e}"}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        try:
+            body = json.dumps(payload, default=_json_default, ensure_ascii=False).encode()
+            head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}", "Content-Type: application/json",
+                    f"Content-Length: {len(body)}", "Connection: close"]
+            head += [f"{k}: {v}" for k, v in headers.items()]
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_head(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        method, target, _ = request_line.split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return method.upper(), target, headers
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    async def _read_body(self, reader, headers):
+        if "transfer-encoding" in headers:
+            raise HttpError(411, "Chunked uploads are not supported; send Content-Length")
+        length = int(headers.get("content-length", 0))
+        if length > self.max_body_bytes:
+            raise HttpError(413, f"Body exceeds {self.max_body_bytes} bytes")
+        return await reader.readexactly(length) if length else b""
+
+    async def route(self, method, url, headers, body):
+        if url.path == "/health":
+            if method != "GET":
+                raise HttpError(405, "Use GET")
+            return 200, self.service.metrics()
+        if url.path == "/score":
+            if method != "POST":
+                raise HttpError(405, "Use POST")
+            source, declared, taxpayer_id, explain = self._parse_score_request(url, headers, body)
+            start = time.perf_counter()
+            try:
+                result = await self.service.score(source, declared, explain)
+            except Overloaded as e:
+                raise HttpError(503, f"Service overloaded: {e}", {"Retry-After": "1"})
+            except ValueError as e:
+                raise HttpError(422, str(e))
+            return 200, {"taxpayer_id": taxpayer_id, "declared_income": declared, **result,
+                         "elapsed_ms": (time.perf_counter() - start) * 1000}
+        raise HttpError(404, f"No route for {url.path}")
+
+    def _parse_score_request(self, url, headers, body):
+        """
+        Returns (source, declared_income, taxpayer_id, explain) from either a
+        JSON body naming a path or a CSV body with query parameters.
+        """
+        if headers.get("content-type", "").split(";")[0].strip() == "application/json":
+            params = json.loads(body or b"{}")
+            if "path" not in params:
+                raise HttpError(400, "JSON requests must name a statement `path`")
+            source = self._resolve_path(params["path"])
+        else:
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            if not body:
+                raise HttpError(400, "Send the statement CSV as the request body")
+            source = body
+        try:
+            declared = float(params["declared_income"])
+        except (KeyError, TypeError, ValueError):
+            raise HttpError(400, "declared_income is required and must be a number")
+        explain = str(params.get("explain", "1")).lower() not in ("0", "false", "no")
+        return source, declared, params.get("taxpayer_id"), explain
+
+    def _resolve_path(self, path):
+        if self.data_dir is None:
+            raise HttpError(403, "Path requests are disabled; start the service with --data-dir")
+        resolved = os.path.realpath(os.path.join(self.data_dir, path))
+        if os.path.commonpath([resolved, self.data_dir]) != self.data_dir:
+            raise HttpError(403, "Path is outside --data-dir")
+        if not os.path.isfile(resolved):
+            raise HttpError(404, f"No statement at {path}")
+        return resolved
+
+async def serve(host="127.0.0.1", port=8765, data_dir=None, max_body_bytes=256 * 1024 * 1024, **service_options):
+    service = ScoringService(**service_options)
+    service.start()
+    server = await asyncio.start_server(ScoringServer(service, max_body_bytes, data_dir).handle, host, port)
+    print(f"[SERVICE] Listening on http://{host}:{port} with {service.workers} workers", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+# --- 4. CLI ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="VeritaxAI local HTTP scoring service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--max-batch", type=int, default=32, help="Most requests scored in one vectorized call")
+    parser.add_argument("--batch-wait-ms", type=float, default=50, help="How long a batch waits for requests still being parsed")
+    parser.add_argument("--max-pending", type=int, default=256, help="Requests accepted at once before answering 503")
+    parser.add_argument("--max-body-mb", type=float, default=256, help="Largest accepted upload")
+    parser.add_argument("--data-dir", default=None, help="Allow JSON requests naming statement paths inside this directory")
+    parser.add_argument("--thresholds", default=None, help="JSON file overriding ReasoningAgent thresholds")
+    parser.add_argument("--cohorts", default=None, help="Cohort index (see batch.py --build-cohorts) to flag peer outliers against")
+    parser.add_argument("--merchant-memo", default=None, help="JSON merchant memo (see batch.py --merchant-memo) to start workers from")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(
+            args.host, args.port, data_dir=args.data_dir, max_body_bytes=int(args.max_body_mb * 1024 * 1024),
+            workers=args.workers, max_batch=args.max_batch, batch_wait_ms=args.batch_wait_ms,
+            max_pending=args.max_pending, thresholds=load_thresholds(args.thresholds),
+            cohorts=args.cohorts, merchant_memo=args.merchant_memo,
+        ))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+VeritaxAI synthetic bank statement generator.
+
+Produces seeded statements in the app's CSV format (date, description,
+amount, type) with realistic shapes: a monthly salary, rent/EMI/insurance
+obligations, many small lifestyle debits, occasional freelance credits and
+miscellaneous spend. Fraud patterns can be injected on top.
+
+    python synthetic.py --rows 1000000 --seed 7 -o statement.csv
+    python synthetic.py --rows 5000 --count 200 --fraud-rate 0.3 --out-dir season/
+
+With --count, one file per taxpayer plus a manifest.csv (path,
+declared_income, taxpayer_id, fraud) are written, ready for batch.py.
+--ring-rate additionally links that share of taxpayers into rings of three
+that pass the same money around ("NEFT to T000042"), for batch.py --graph.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+FRAUD_PATTERNS = ("inflated_inflows", "benford_violation", "lifestyle_gap")
+
+LIFESTYLE_DESCRIPTIONS = ["Grocery Store", "Swiggy Order", "Food Court", "BigBasket Grocery", "Swiggy Instamart"]
+MISC_DEBIT_DESCRIPTIONS = ["Amazon Purchase", "Uber Ride", "Electricity Bill", "Mobile Recharge", "Petrol Pump", "Pharmacy", "Movie Tickets"]
+MISC_CREDIT_DESCRIPTIONS = ["Refund", "Interest Credit", "Cashback"]
+FREELANCE_DESCRIPTIONS = ["Upwork Payout", "Freelance Project", "Client Payment"]
+INFLATED_DESCRIPTIONS = ["Cash Deposit", "IMPS Transfer In", "NEFT Credit"]
+
+# Row mix for the non-recurring part of a statement.
+KIND_WEIGHTS = {"lifestyle": 0.55, "misc_debit": 0.30, "misc_credit": 0.07, "freelance": 0.08}
+# Total of each kind as a share of salary income over the statement.
+KIND_SHARE_OF_SALARY = {"lifestyle": 0.25, "misc_debit": 0.25, "misc_credit": 0.02, "freelance": 0.08}
+
+# Statements span one to ten years (income is declared per year, so a
+# shorter statement would make every salary credit look outsized); beyond
+# ten years, extra rows mean a busier (e.g. corporate-linked) account with
+# proportionally larger income.
+ROWS_PER_DAY = 8
+MIN_DAYS = 365
+MAX_DAYS = 3650
+START_DATE = pd.Timestamp("2020-01-01")
+
+def _monthly(months, day, description, amount, kind_type, rng, jitter_days=2):
+    dates = START_DATE + pd.DateOffset(days=day) + pd.to_timedelta(np.arange(months) * 30 + rng.integers(-jitter_days, jitter_days + 1, months), unit="D")
+    return pd.DataFrame({
+        "date": dates,
+        "description": description,
+        "amount": np.full(months, float(amount)),
+        "type": kind_type,
+    })
+
+def generate_statement(rows=1000, seed=0, fraud=(), monthly_salary=None):
+    """
+    Returns (df, declared_income) for one synthetic statement of about `rows`
+    transactions. `declared_income` is the honest income over the
+    statement period (salary plus freelance and miscellaneous credits), so
+    injected inflows show up as under-reporting.
+    """
+    unknown = set(fraud) - set(FRAUD_PATTERNS)
+    if unknown:
+        raise ValueError(f"Unknown fraud patterns: {', '.join(sorted(unknown))}")
+    rng = np.random.default_rng(seed)
+    days = int(np.clip(rows // ROWS_PER_DAY, MIN_DAYS, MAX_DAYS))
+    months = max(1, days // 30)
+    volume_scale = max(1.0, rows / (days * ROWS_PER_DAY))
+    salary = float(monthly_salary or round(rng.lognormal(11, 0.5) * volume_scale, -2))
+
+    recurring = [
+        _monthly(months, 1, "Salary Credit", salary, "credit", rng, jitter_days=0),
+        _monthly(months, 3, "Rent Payment", round(salary * rng.uniform(0.2, 0.35), -2), "debit", rng),
+        _monthly(months, 7, "Home Loan EMI", round(salary * rng.uniform(0.1, 0.25), -2), "debit", rng),
+        _monthly(months, 15, "Insurance Premium", round(salary * rng.uniform(0.02, 0.05), -2), "debit", rng),
+    ]
+    recurring = pd.concat(recurring, ignore_index=True)
+
+    n = max(0, rows - len(recurring))
+    kinds = rng.choice(list(KIND_WEIGHTS), size=n, p=list(KIND_WEIGHTS.values()))
+    amount = np.empty(n)
+    description = np.empty(n, dtype=object)
+    types = np.where(np.isin(kinds, ["misc_credit", "freelance"]), "credit", "debit")
+    for kind, pool, mu, sigma in (
+        ("lifestyle", LIFESTYLE_DESCRIPTIONS, 6.2, 0.8),
+        ("misc_debit", MISC_DEBIT_DESCRIPTIONS, 7.0, 1.1),
+        ("misc_credit", MISC_CREDIT_DESCRIPTIONS, 5.5, 1.0),
+        ("freelance", FREELANCE_DESCRIPTIONS, 9.5, 0.7),
+    ):
+        mask = kinds == kind
+        draws = rng.lognormal(mu, sigma, mask.sum())
+        if len(draws):
+            # Keep the lognormal shape but scale the kind's total to its share of salary.
+            draws *= KIND_SHARE_OF_SALARY[kind] * salary * months * rng.uniform(0.7, 1.3) / draws.sum()
+        amount[mask] = draws
+        description[mask] = rng.choice(pool, mask.sum())
+    # Small reference suffixes like real exports ("Swiggy Order 4821").
+    suffix = rng.integers(1000, 9999, n).astype(str)
+    description = np.where(rng.random(n) < 0.5, description + " " + suffix, description)
+    events = pd.DataFrame({
+        "date": START_DATE + pd.to_timedelta(rng.integers(0, days, n), unit="D"),
+        "description": description,
+        "amount": np.round(amount, 2),
+        "type": types,
+    })
+    df = pd.concat([recurring, events], ignore_index=True)
+    # Declared: every legitimate inflow (salary, freelance and misc credits)
+    # over the statement period, so only injected inflows are undeclared.
+    declared = float(df.loc[df["type"] == "credit", "amount"].sum())
+
+    if "inflated_inflows" in fraud:
+        extra = max(1, len(df) // 50)
+        total = declared * rng.uniform(0.5, 2.0)
+        df = pd.concat([df, pd.DataFrame({
+            "date": START_DATE + pd.to_timedelta(rng.integers(0, days, extra), unit="D"),
+            "description": rng.choice(INFLATED_DESCRIPTIONS, extra),
+            "amount": np.round(rng.dirichlet(np.ones(extra)) * total, 2),
+            "type": "credit",
+        })], ignore_index=True)
+    if "benford_violation" in fraud:
+        # Fabricated expenses cluster on "comfortable" leading digits.
+        debits = (df["type"] == "debit").to_numpy() & ~df["description"].str.contains("Rent|EMI|Premium").to_numpy()
+        magnitude = 10.0 ** np.floor(np.log10(np.maximum(df.loc[debits, "amount"].to_numpy(), 1)))
+        df.loc[debits, "amount"] = np.round(rng.uniform(4, 9.99, debits.sum()) * magnitude, 2)
+    if "lifestyle_gap" in fraud:
+        lifestyle = df["description"].str.contains("|".join(d.split()[0] for d in LIFESTYLE_DESCRIPTIONS)).to_numpy()
+        df = df[~lifestyle | (rng.random(len(df)) < 0.02)]
+
+    df = df.sort_values("date", kind="stable").reset_index(drop=True)
+    df["date"] = df["date"].dt.strftime("%Y-%m-%d")
+    return df, round(declared, 2)
+
+def ring_transfers(members, rng, transfers=6):
+    """
+    {member: DataFrame} of the rows that cycle one sum around `members`:
+    each month every member passes it on to the next, a day after receiving.
+    """
+    amount = round(rng.lognormal(13, 0.5) / transfers, -2)
+    days = np.sort(rng.choice(np.arange(0, 300, 30), transfers, replace=False))
+    rows = {member: [] for member in members}
+    for step, (sender, receiver) in enumerate(zip(members, members[1:] + members[:1])):
+        dates = (START_DATE + pd.to_timedelta(days + step, unit="D")).strftime("%Y-%m-%d")
+        rows[sender].append(pd.DataFrame({"date": dates, "description": f"NEFT to {receiver}", "amount": amount, "type": "debit"}))
+        rows[receiver].append(pd.DataFrame({"date": dates, "description": f"NEFT from {sender}", "amount": amount, "type": "credit"}))
+    return {member: pd.concat(frames, ignore_index=True) for member, frames in rows.items()}
+
+def write_season(out_dir, count, rows, seed=0, fraud_rate=0.2, ring_rate=0.0):
+    """
+    Writes `count` statements plus a manifest.csv for batch.py. Each
+    fraudulent taxpayer gets one or more randomly chosen patterns, and a
+    `ring_rate` share of taxpayers is linked into circular-flow rings.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    ring_rows = {}
+    if ring_rate > 0:
+        # Own generator, so adding rings leaves the rest of the season unchanged.
+        ring_rng = np.random.default_rng([seed, 1])
+        ring_members = ring_rng.permutation(count)[:int(count * ring_rate) // 3 * 3]
+        for members in ring_members.reshape(-1, 3):
+            ring_rows.update(ring_transfers([f"T{i:06d}" for i in members], ring_rng))
+    manifest = []
+    for i in range(count):
+        fraud = ()
+        if rng.random() < fraud_rate:
+            fraud = tuple(p for p in FRAUD_PATTERNS if rng.random() < 0.5) or (rng.choice(FRAUD_PATTERNS),)
+        df, declared = generate_statement(rows, seed=seed * 1_000_003 + i, fraud=fraud)
+        if f"T{i:06d}" in ring_rows:
+            df = pd.concat([df, ring_rows[f"T{i:06d}"]], ignore_index=True).sort_values("date", kind="stable")
+            fraud += ("circular_flow",)
+        name = f"taxpayer_{i:06d}.csv"
+        df.to_csv(os.path.join(out_dir, name), index=False)
+        manifest.append({"path": name, "declared_income": declared, "taxpayer_id": f"T{i:06d}", "fraud": "+".join(fraud)})
+    pd.DataFrame(manifest).to_csv(os.path.join(out_dir, "manifest.csv"), index=False)
+    return manifest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic bank statements")
+    parser.add_argument("--rows", type=int, default=1000, help="Transactions per statement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fraud", default="", help=f"Comma-separated patterns: {', '.join(FRAUD_PATTERNS)}")
+    parser.add_argument("-o", "--output", default=None, help="Output CSV for a single statement (default: stdout)")
+    parser.add_argument("--count", type=int, default=None, help="Write this many statements and a manifest to --out-dir")
+    parser.add_argument("--out-dir", default="synthetic_season")
+    parser.add_argument("--fraud-rate", type=float, default=0.2, help="Share of fraudulent taxpayers with --count")
+    parser.add_argument("--ring-rate", type=float, default=0.0, help="Share of taxpayers in circular-flow rings with --count")
+    args = parser.parse_args(argv)
+
+    if args.count:
+        write_season(args.out_dir, args.count, args.rows, seed=args.seed, fraud_rate=args.fraud_rate, ring_rate=args.ring_rate)
+        print(f"Wrote {args.count} statements and manifest.csv to {args.out_dir}", file=sys.stderr)
+        return 0
+
+    fraud = tuple(p for p in args.fraud.split(",") if p)
+    df, declared = generate_statement(args.rows, seed=args.seed, fraud=fraud)
+    df.to_csv(args.output or sys.stdout, index=False)
+    print(f"{len(df)} rows, declared income {declared:,.0f}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
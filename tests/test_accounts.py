@@ -0,0 +1,59 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from core import ObservationAgent, account_names, match_transfers
+
+
+def test_transfer_window_counts_local_days():
+    # Three local days apart, but four in UTC (IST is UTC+5:30).
+    dates = pd.DatetimeIndex(["2024-01-04 00:30", "2024-01-07 23:00"]).tz_localize("Asia/Kolkata")
+    debit, credit = match_transfers(dates, np.array([5_000_000, 5_000_000]), np.array([2, 1]), np.array([0, 1]),
+                                    window_days=3)
+    assert debit.tolist() == [0] and credit.tolist() == [1]
+
+
+def test_identically_named_statements_get_distinct_accounts(tmp_path):
+    paths = []
+    for bank, amount in (("bankA", 90_000), ("bankB", 12_000)):
+        (tmp_path / bank).mkdir()
+        path = tmp_path / bank / "statement.csv"
+        path.write_text(f"date,description,amount,type\n2024-01-01,SALARY {bank},{amount},credit\n")
+        paths.append(str(path))
+    observed = ObservationAgent().observe_accounts(paths)
+    assert observed["accounts"] == ["bankA/statement", "bankB/statement"]
+    assert observed["summary"].total_inflow == 102_000
+
+
+def test_account_names_are_unique():
+    class Upload(io.BytesIO):
+        name = "statement.csv"
+
+    assert account_names([Upload(), Upload(), "a/b.csv", "a/b.arrow"]) == ["statement", "statement#2", "a/b", "a/b#2"]
+
+
+def test_repeated_amounts_pair_with_their_own_transfer():
+    # A monthly ₹25,000 sweep from account 0 to 1 for 40 years, credited a day later.
+    n = 480
+    debit_dates = pd.date_range("1990-01-05", periods=n, freq="MS") + pd.Timedelta(days=4)
+    dates = debit_dates.append(debit_dates + pd.Timedelta(days=1))
+    paise = np.full(2 * n, 2_500_000)
+    types = np.repeat([2, 1], n)
+    accounts = np.repeat([0, 1], n)
+    debit, credit = match_transfers(dates, paise, types, accounts)
+    assert debit.tolist() == list(range(n))
+    assert credit.tolist() == list(range(n, 2 * n))
+
+
+def test_many_repeated_amounts_match_within_the_window():
+    rng = np.random.default_rng(0)
+    n = 40_000  # one round amount throughout: a plain join on it would pair every debit with every credit
+    days = rng.integers(0, 3650, n)
+    dates = pd.DatetimeIndex(pd.Timestamp("2015-01-01") + pd.to_timedelta(days, unit="D"))
+    types, accounts = rng.choice([1, 2], n), rng.integers(0, 2, n)
+    debit, credit = match_transfers(dates, np.full(n, 1_000_000), types, accounts)
+    assert len(debit) > n // 4
+    assert (np.abs(days[debit] - days[credit]) <= 3).all()
+    assert (types[debit] == 2).all() and (types[credit] == 1).all() and (accounts[debit] != accounts[credit]).all()
+    assert len(np.unique(debit)) == len(debit) and len(np.unique(credit)) == len(credit)
@@ -0,0 +1,60 @@
+import json
+
+import pandas as pd
+
+import batch
+from batch import main, read_journal
+from synthetic import generate_statement
+
+SCORE_COLUMNS = ["taxpayer_id", "status", "risk_level", "risk_score", "signal_mask", "total_inflow", "explanation"]
+
+
+def _season(tmp_path, count=4):
+    manifest = []
+    for i in range(count):
+        df, declared = generate_statement(400, seed=i, fraud=("inflated_inflows",) if i % 2 else ())
+        df.to_csv(tmp_path / f"t{i}.csv", index=False)
+        manifest.append({"path": f"t{i}.csv", "declared_income": declared, "taxpayer_id": f"T{i}"})
+    (tmp_path / "broken.csv").write_text("date,description\nnot,a statement\n")
+    manifest.append({"path": "broken.csv", "declared_income": 1.0, "taxpayer_id": "TX"})
+    pd.DataFrame(manifest).to_csv(tmp_path / "manifest.csv", index=False)
+    return str(tmp_path / "manifest.csv")
+
+
+def test_read_journal_skips_a_truncated_last_line(tmp_path):
+    journal = tmp_path / "out.csv.journal.jsonl"
+    rows = [{"taxpayer_id": "A", "status": "ok"}, {"taxpayer_id": "B", "status": "error"}, {"taxpayer_id": "A", "status": "error"}]
+    journal.write_text("".join(json.dumps(r) + "\n" for r in rows) + '{"taxpayer_id": "C", "sta')
+    assert read_journal(str(journal)) == {"A": rows[2], "B": rows[1]}
+    assert read_journal(str(tmp_path / "missing.jsonl")) == {}
+
+
+def test_resume_only_reruns_missing_and_failed_taxpayers(tmp_path, monkeypatch):
+    manifest = _season(tmp_path)
+    fresh = str(tmp_path / "fresh.csv")
+    assert main([manifest, "-o", fresh, "-w", "1"]) == 1
+
+    resumed = str(tmp_path / "resumed.csv")
+    lines = open(fresh + ".journal.jsonl").read().splitlines()
+    kept = [line for line in lines if json.loads(line)["taxpayer_id"] in ("T0", "T2", "TX")]
+    with open(resumed + ".journal.jsonl", "w") as fh:
+        fh.write("\n".join(kept) + "\n" + lines[1][:20])
+
+    ran = []
+    run_batch = batch.run_batch
+
+    def recording_run_batch(tasks, *args, **kwargs):
+        ran.extend(task[0] for task in tasks)
+        return run_batch(tasks, *args, **kwargs)
+
+    monkeypatch.setattr(batch, "run_batch", recording_run_batch)
+    assert main([manifest, "-o", resumed, "-w", "1"]) == 1
+    assert ran == ["T1", "T3", "TX"]
+
+    expected, actual = pd.read_csv(fresh), pd.read_csv(resumed)
+    pd.testing.assert_frame_equal(actual[SCORE_COLUMNS], expected[SCORE_COLUMNS])
+    assert list(actual["status"]) == ["ok"] * 4 + ["error"]
+
+    assert main([manifest, "-o", resumed, "-w", "1", "--fresh"]) == 1
+    assert len(read_journal(resumed + ".journal.jsonl")) == 5
+    assert len(open(resumed + ".journal.jsonl").read().splitlines()) == 5
@@ -0,0 +1,65 @@
+import math
+
+import numpy as np
+import pytest
+
+from core import BENFORD_FIRST_DIGIT, BenfordCounts, leading_digits
+
+
+def _string_digits(amount, n_digits):
+    digits = f"{amount:.10f}".replace(".", "").lstrip("0")
+    return int(digits[:n_digits])
+
+
+def test_leading_digits_match_decimal_reading():
+    rng = np.random.default_rng(0)
+    amounts = np.concatenate([np.round(10 ** rng.uniform(-2, 7, 5000), 2),
+                              [0.29, 0.01, 0.1, 1.0, 9.99, 10.0, 99.99, 100.0, 1000.0, 2.9e-05]])
+    amounts = amounts[amounts > 0]
+    for n_digits in (1, 2):
+        expected = [_string_digits(a, n_digits) for a in amounts]
+        assert leading_digits(amounts, n_digits).tolist() == expected
+
+
+def test_leading_digits_of_invalid_amounts_are_zero():
+    assert leading_digits([0.0, -12.5, np.nan, np.inf, 12.5]).tolist() == [0, 0, 0, 0, 1]
+
+
+def test_uniform_digits_fail_every_test():
+    # 100 amounts per first digit; expected values computed from log10(1 + 1/d).
+    fd = BenfordCounts.from_amounts(np.repeat(np.arange(1, 10) + 0.5, 100)).tests()["first_digit"]
+    assert fd["n"] == 900
+    assert fd["chi2"] == pytest.approx(361.5284636209621)
+    assert fd["mad"] == pytest.approx(0.05971703510991756)
+    assert fd["ks"] == pytest.approx(0.268726657994629)
+    assert fd["ks_critical"] == pytest.approx(1.36 / 30)
+    assert fd["chi2"] > fd["chi2_critical"] and fd["conformity"] == "nonconforming"
+
+
+def test_benford_sample_conforms():
+    rng = np.random.default_rng(1)
+    counts = BenfordCounts.from_amounts(10 ** rng.uniform(0, 6, 50_000))
+    fd, ftd = counts.tests()["first_digit"], counts.tests()["first_two_digits"]
+    expected = 50_000 * BENFORD_FIRST_DIGIT
+    chi2 = sum((o - e) ** 2 / e for o, e in zip(counts.first_digit[1:], expected))
+    assert fd["chi2"] == pytest.approx(chi2) and fd["chi2"] < fd["chi2_critical"]
+    assert fd["conformity"] == "close" and ftd["conformity"] == "close"
+    assert fd["ks"] < fd["ks_critical"]
+    assert counts.first_digit_mad() == pytest.approx(fd["mad"])
+    assert fd["mad"] == pytest.approx(np.mean([abs(o / 50_000 - math.log10(1 + 1 / d))
+                                               for d, o in enumerate(counts.first_digit[1:], 1)]))
+
+
+def test_counts_merge_like_one_pass():
+    rng = np.random.default_rng(2)
+    amounts = np.round(10 ** rng.uniform(0, 5, 3000), 2)
+    merged = BenfordCounts.from_amounts(amounts[:1234]) + BenfordCounts.from_amounts(amounts[1234:])
+    whole = BenfordCounts.from_amounts(amounts)
+    np.testing.assert_array_equal(merged.first_two_digits, whole.first_two_digits)
+    assert merged.tests() == whole.tests()
+
+
+def test_empty_counts_report_insufficient_data():
+    empty = BenfordCounts()
+    assert empty.tests()["first_digit"]["conformity"] == "insufficient data"
+    assert math.isnan(empty.first_digit_mad())
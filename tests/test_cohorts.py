@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from core import CohortIndex, ReasoningAgent, ResultCache, run_cached_pipeline
+
+
+def _population(n=2000, zero_share=0.3, seed=0):
+    rng = np.random.default_rng(seed)
+    declared = np.full(n, 600_000.0)
+    lifestyle = rng.lognormal(11, 0.5, n)
+    lifestyle[: int(n * zero_share)] = 0.0
+    return pd.DataFrame({
+        "declared_income": declared,
+        "total_inflow": declared * rng.lognormal(0, 0.2, n),
+        "fixed_expenses": declared * rng.uniform(0.1, 0.3, n),
+        "lifestyle_spend": lifestyle,
+        "benford_mad": rng.uniform(0.0, 0.02, n),
+    })
+
+
+def test_tied_mass_at_minimum_is_not_a_tail():
+    population = _population()
+    reasoner = ReasoningAgent(cohorts=CohortIndex.build(population))
+    percentiles, _ = reasoner.cohort_percentiles(population)
+    zero = population["lifestyle_spend"] == 0
+    assert np.allclose(percentiles.loc[zero, "lifestyle_share"], zero.mean(), atol=1e-6)
+    flagged = reasoner.cohort_outliers(percentiles)["lifestyle_share"]
+    assert not flagged[zero].any()
+    assert flagged.mean() <= 0.02
+
+
+def test_tied_mass_at_maximum_is_not_a_tail():
+    population = _population()
+    population.loc[:599, "benford_mad"] = 0.5  # clamped to the top of the range
+    reasoner = ReasoningAgent(cohorts=CohortIndex.build(population))
+    percentiles, _ = reasoner.cohort_percentiles(population)
+    assert not reasoner.cohort_outliers(percentiles)["benford_mad"].iloc[:600].any()
+
+
+def test_lone_extremes_are_flagged():
+    population = _population(zero_share=0.0)
+    population.loc[0, "total_inflow"] = population["declared_income"].iloc[0] * 50
+    population.loc[1, "lifestyle_spend"] = 1.0
+    reasoner = ReasoningAgent(cohorts=CohortIndex.build(population))
+    flagged = reasoner.cohort_outliers(reasoner.cohort_percentiles(population)[0])
+    assert flagged.loc[0, "inflow_ratio"]
+    assert flagged.loc[1, "lifestyle_share"]
+
+
+def test_cached_reports_follow_cohort_content(tmp_path):
+    statement = b"date,description,amount,type\n2024-01-01,SALARY,90000,credit\n2024-01-05,RENT,20000,debit\n"
+    first, second = CohortIndex.build(_population(seed=1)), CohortIndex.build(_population(seed=2))
+    first.save(str(tmp_path / "season"))
+    reloaded = CohortIndex.load(str(tmp_path / "season"))
+    assert reloaded.digest == first.digest != second.digest
+    cache = ResultCache()
+    key, _ = run_cached_pipeline(cache, statement, 600_000.0, cohorts=first)
+    assert run_cached_pipeline(cache, statement, 600_000.0, cohorts=str(tmp_path / "season"))[0] == key
+    second.save(str(tmp_path / "season"))  # rebuilt in place
+    assert run_cached_pipeline(cache, statement, 600_000.0, cohorts=str(tmp_path / "season"))[0] != key
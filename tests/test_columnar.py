@@ -0,0 +1,97 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from core import ObservationAgent, TaxpayerState
+
+
+def _statement(n, seed, start="2024-01-01"):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": pd.date_range(start, periods=n, freq="D").strftime("%Y-%m-%d"),
+        "description": rng.choice(["SALARY", "RENT PAYMENT", "SWIGGY ORDER", "TRANSFER TO SAVINGS"], n),
+        "amount": np.round(rng.uniform(100, 50_000, n), 2),
+        "type": rng.choice(["credit", "debit"], n),
+    })
+
+
+def _saved(observer, frame, path):
+    observed = observer.observe(io.StringIO(frame.to_csv(index=False)))
+    observer.save(observed, path)
+    return path
+
+
+def _csv(frame, path):
+    frame.to_csv(path, index=False)
+    return path
+
+
+def test_observe_accounts_reads_saved_statements(tmp_path):
+    observer = ObservationAgent()
+    main, savings = _statement(120, 0), _statement(80, 1)
+    savings.loc[:9] = main.loc[:9].to_numpy()  # an overlapping export
+    csv = observer.observe_accounts({"main": _csv(main, tmp_path / "main.csv"),
+                                     "savings": _csv(savings, tmp_path / "savings.csv")})
+    # A path and an uploaded file's bytes.
+    arrow = observer.observe_accounts({"main": _saved(observer, main, tmp_path / "main.arrow"),
+                                       "savings": _saved(observer, savings, tmp_path / "savings.arrow").read_bytes()})
+    assert "error" not in arrow
+    assert arrow["summary"].to_dict() == csv["summary"].to_dict()
+    assert arrow["duplicates_removed"] == csv["duplicates_removed"] == 10
+    assert len(arrow["transfers"]) == len(csv["transfers"])
+
+
+def test_observe_accounts_rejects_other_arrow_files(tmp_path):
+    path = tmp_path / "other.arrow"
+    pd.DataFrame({"x": [1, 2]}).to_feather(path)
+    observed = ObservationAgent().observe_accounts([str(path), str(path)])
+    assert observed["error"] == "Not a saved VeritaxAI statement"
+
+
+def test_observe_increment_reads_saved_statements(tmp_path):
+    observer = ObservationAgent()
+    full = _statement(200, 2)
+    observed, state = observer.observe_increment(_saved(observer, full[:150], tmp_path / "s.arrow"), TaxpayerState())
+    assert observed["rows_added"] == 150 and state.byte_offset is None
+    observed, state = observer.observe_increment(_saved(observer, full, tmp_path / "s.arrow").read_bytes(), state)
+    assert observed["rows_added"] == 50
+    # A CSV export of the same statement afterwards adds nothing.
+    observed, state = observer.observe_increment(str(_csv(full, tmp_path / "s.csv")), state)
+    assert observed["rows_added"] == 0
+    expected = observer.observe(io.StringIO(full.to_csv(index=False)))
+    assert state.summary.to_dict() == expected["summary"].to_dict()
+
+
+class _OneWay(io.RawIOBase):
+    """A readable stream that can't seek, like a pipe or an HTTP body."""
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self._data.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+
+class _Broken(io.BytesIO):
+    def tell(self):
+        raise OSError("device not ready")
+
+
+def test_unreadable_sources_return_errors(tmp_path):
+    observer = ObservationAgent()
+    saved = _saved(observer, _statement(50, 3), tmp_path / "s.arrow").read_bytes()
+    for observe in (observer.observe, observer.observe_stream):
+        assert "error" in observe(io.BytesIO(saved[:40]))
+        assert observe(_Broken(b"date,description,amount,type\n"))["error"] == "device not ready"
+
+
+def test_unseekable_csv_streams_are_read():
+    data = _statement(50, 4).to_csv(index=False).encode()
+    observer = ObservationAgent()
+    assert observer.observe(io.BufferedReader(_OneWay(data)))["transaction_count"] == 50
+    assert observer.observe_stream(io.BufferedReader(_OneWay(data)))["transaction_count"] == 50
@@ -0,0 +1,49 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from core import ObservationAgent, parse_dates, statement_amounts, type_codes
+
+
+def _statement(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": rng.choice(pd.date_range("2024-01-01", periods=60, freq="D").strftime("%Y-%m-%d"), n),
+        "description": rng.choice(["SALARY ACME", "UPI SWIGGY", "RENT PAYMENT", "ATM CASH"], n),
+        "amount": np.round(rng.uniform(1, 90_000, n), 2),
+        "type": rng.choice(["credit", "Debit", "DEBIT", "reversal"], n),
+        "balance": np.round(rng.uniform(0, 1e6, n), 2),
+    })
+
+
+def test_compact_frame_round_trips_every_row():
+    df = _statement()
+    raw = ObservationAgent().observe(io.StringIO(df.to_csv(index=False)))["raw_df"]
+    expected = df.assign(date=pd.to_datetime(df["date"])).sort_values("date", kind="stable")
+
+    assert raw["amount_paise"].dtype == np.int64 and "amount" not in raw.columns
+    assert isinstance(raw["description"].dtype, pd.CategoricalDtype)
+    assert raw["type"].cat.codes.dtype == np.int8
+    assert list(raw.index) == list(expected.index)
+    np.testing.assert_array_equal(statement_amounts(raw), expected["amount"].to_numpy())
+    np.testing.assert_array_equal(raw["date"].to_numpy(), expected["date"].to_numpy())
+    assert list(raw["description"].astype(str)) == list(expected["description"])
+    assert list(raw["type"].astype(str)) == list(expected["type"].str.lower().replace("reversal", "other"))
+    np.testing.assert_array_equal(raw["balance"].to_numpy(), expected["balance"].to_numpy())
+
+
+def test_sub_paise_amounts_stay_in_rupees():
+    df = _statement(50, seed=1)
+    df.loc[7, "amount"] = 12.345
+    raw = ObservationAgent().observe(io.StringIO(df.to_csv(index=False)))["raw_df"]
+    assert "amount_paise" not in raw.columns
+    np.testing.assert_array_equal(statement_amounts(raw.sort_index()), df["amount"].to_numpy())
+
+
+def test_parse_dates_and_type_codes_per_distinct_value():
+    values = ["2024-03-01", "2024-01-15", None, "2024-03-01"]
+    parsed = parse_dates(values)
+    assert parsed.equals(pd.DatetimeIndex(pd.to_datetime(pd.Series(values))))
+    assert type_codes(["Credit", "debit", None, "refund", "CREDIT"]).tolist() == [1, 2, 0, 0, 1]
+    assert type_codes(pd.Categorical([])).dtype == np.int8
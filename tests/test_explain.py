@@ -0,0 +1,29 @@
+from core import SIGNAL_FLAGS, ActionAgent, peer_outlier_signal
+
+GAP_TEXT = "lifestyle-income gap"
+BENFORD_TEXT = "Benford's Law"
+
+
+def _reasoning(signals, mask):
+    return {"risk_score": 1, "signals": signals, "signal_mask": mask, "mismatch_ratio": 0.0,
+            "hypothesis": "consistent_profile"}
+
+
+def test_spend_collapse_alone_is_not_a_lifestyle_gap():
+    reasoning = _reasoning(["Lifestyle Collapse: discretionary spend fell 75% from 2024-06"],
+                           SIGNAL_FLAGS["spend_collapse"])
+    assert GAP_TEXT not in ActionAgent().explain(600_000.0, None, reasoning)
+
+
+def test_benford_deviation_peer_outlier_is_not_a_benford_violation():
+    reasoning = _reasoning([peer_outlier_signal({"benford_mad": 0.999}, ["benford_mad"], "salaried / metro")],
+                           SIGNAL_FLAGS["cohort_outlier"])
+    assert BENFORD_TEXT not in ActionAgent().explain(600_000.0, None, reasoning)
+
+
+def test_narrative_follows_signal_bits():
+    reasoning = _reasoning(["⚠️ Digital Lifestyle Gap: High fixed bills (₹120,000) but near-zero daily spend.",
+                            "⚠️ Benford's Law Violation: Digit '1' freq is 12.0%"],
+                           SIGNAL_FLAGS["lifestyle_gap"] | SIGNAL_FLAGS["benford"])
+    report = ActionAgent().explain(600_000.0, None, reasoning)
+    assert GAP_TEXT in report and BENFORD_TEXT in report
@@ -0,0 +1,76 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import ObservationAgent, TaxpayerState, row_hashes
+from synthetic import generate_statement
+
+
+def _months(df, months):
+    dates = pd.to_datetime(df["date"])
+    return df[dates < dates.min() + pd.DateOffset(months=months)]
+
+
+def _reloaded(state, tmp_path):
+    path = tmp_path / "state.json"
+    state.save(path)
+    return TaxpayerState.load(path)
+
+
+def test_monthly_appends_match_a_full_recompute(tmp_path):
+    observer = ObservationAgent()
+    df, _ = generate_statement(3000, seed=4, fraud=("inflated_inflows",))
+    state = TaxpayerState.load(tmp_path / "missing.json")
+    added = 0
+    for months in (3, 7, 12):
+        data = _months(df, months).to_csv(index=False).encode()
+        appended = state.appended_bytes(data)
+        if state.rows:
+            assert appended == data[:data.index(b"\n") + 1] + data[state.byte_offset:]
+        observed, state = observer.observe_increment(data, state)
+        added += observed["rows_added"]
+        state = _reloaded(state, tmp_path)
+
+        full = observer.observe_stream(io.BytesIO(data))
+        assert added == state.rows == full["summary"].transaction_count
+        assert state.summary.to_dict() == full["summary"].to_dict()
+        assert observed["window_features"] == pytest.approx(full["window_features"], rel=1e-12)
+
+
+def test_reexport_skips_processed_rows_by_date_and_hash(tmp_path):
+    observer = ObservationAgent()
+    rows = pd.DataFrame({
+        "date": ["2024-01-05", "2024-01-10", "2024-01-10", None],
+        "description": ["SALARY", "UPI SWIGGY", "UPI SWIGGY", "ATM CASH"],
+        "amount": [50_000.0, 250.0, 250.0, 2_000.0],
+        "type": ["credit", "debit", "debit", "debit"],
+    })
+    path = tmp_path / "statement.csv"
+    rows.to_csv(path, index=False)
+    _, state = observer.observe_increment(str(path), TaxpayerState())
+    assert state.rows == 4 and state.last_date == pd.Timestamp("2024-01-10")
+
+    # A new export that rewrites history: a late row before the boundary is
+    # taken as processed, the third identical boundary row and a second
+    # undated row are new.
+    reexport = pd.concat([rows.iloc[[1, 0, 2, 3, 3, 1]], pd.DataFrame({
+        "date": ["2024-01-03", "2024-01-11"], "description": ["LATE FEE", "RENT"],
+        "amount": [99.0, 20_000.0], "type": ["debit", "debit"],
+    })], ignore_index=True)
+    reexport.to_csv(path, index=False)
+    assert state.appended_bytes(str(path)) is None
+    observed, state = observer.observe_increment(str(path), _reloaded(state, tmp_path))
+    assert observed["rows_added"] == 3
+    assert state.summary.total_outflow == 250.0 * 3 + 2_000.0 * 2 + 20_000.0
+    assert state.boundary_hashes == {int(row_hashes(pd.DatetimeIndex(["2024-01-11"]), pd.Series(["RENT"]),
+                                                    pd.Series([20_000.0]), pd.Series(["debit"]))[0]): 1}
+
+
+def test_new_rows_counts_duplicates_on_the_boundary_day():
+    dates = pd.DatetimeIndex(["2024-03-01", "2024-03-02", "2024-03-02", "2024-03-02", "2024-03-03"])
+    hashes = np.array([1, 7, 7, 8, 9], dtype=np.uint64)
+    state = TaxpayerState(rows=2, last_date=pd.Timestamp("2024-03-02"), boundary_hashes={7: 1})
+    assert state.new_rows(dates, hashes).tolist() == [False, False, True, True, True]
+    assert TaxpayerState.from_dict(state.to_dict()).boundary_hashes == {7: 1}
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import TransactionIndex
+
+
+def _frame(dates):
+    n = len(dates)
+    return pd.DataFrame({
+        "date": dates,
+        "description": pd.Categorical([f"UPI {i}" for i in range(n)]),
+        "amount": [100.0 * (i + 1) for i in range(n)],
+        "type": pd.Categorical(["debit"] * n),
+        "category": pd.Categorical(["Other"] * n),
+    })
+
+
+def test_date_filter_uses_the_statements_local_day():
+    # 00:30 IST on 2 January is still 1 January in UTC.
+    dates = pd.DatetimeIndex(["2024-01-01 12:00", "2024-01-02 00:30", "2024-01-02 23:45"]).tz_localize("Asia/Kolkata")
+    index = TransactionIndex(_frame(dates))
+    first, last, _, _ = index.bounds()
+    assert (first.date(), last.date()) == (pd.Timestamp("2024-01-01").date(), pd.Timestamp("2024-01-02").date())
+    positions = index.query(date_range=(pd.Timestamp("2024-01-02"), pd.Timestamp("2024-01-03")))
+    assert sorted(positions.tolist()) == [1, 2]
+
+
+def _compact(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": pd.DatetimeIndex(rng.choice(pd.date_range("2024-01-01", periods=90, freq="D"), n)),
+        "description": pd.Categorical(rng.choice(["UPI Swiggy", "SALARY ACME", "Rent", "upi zomato", "ATM"], n)),
+        "amount_paise": rng.integers(100, 500, n) * 100,
+        "type": pd.Categorical(rng.choice(["credit", "debit"], n)),
+        "category": pd.Categorical(rng.choice(["Lifestyle", "Income", "Housing"], n)),
+    })
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"date_range": (pd.Timestamp("2024-02-01"), pd.Timestamp("2024-02-15"))},
+    {"amount_range": (150.0, 300.0), "types": ["debit"]},
+    {"categories": ["Lifestyle", "Missing"], "search": "UPI"},
+    {"categories": [], "search": "upi"},
+])
+@pytest.mark.parametrize("sort_by", ["date", "amount"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_pages_match_a_full_filter_and_sort(filters, sort_by, descending):
+    df = _compact()
+    index = TransactionIndex(df)
+    positions = index.query(sort_by=sort_by, descending=descending, **filters)
+
+    amount = df["amount_paise"] / 100
+    keep = pd.Series(True, index=df.index)
+    if "date_range" in filters:
+        keep &= (df["date"] >= filters["date_range"][0]) & (df["date"] < filters["date_range"][1])
+    if "amount_range" in filters:
+        keep &= amount.between(*filters["amount_range"])
+    if "types" in filters:
+        keep &= df["type"].isin(filters["types"])
+    if "categories" in filters:
+        keep &= df["category"].isin(filters["categories"])
+    if "search" in filters:
+        keep &= df["description"].astype(str).str.lower().str.contains(filters["search"].lower())
+    key = df["date"] if sort_by == "date" else amount
+    expected = key[keep].sort_values(kind="stable").index.to_numpy()
+    assert positions.tolist() == (expected[::-1] if descending else expected).tolist()
+
+    page_size = 300
+    pages = [index.page(positions, p, page_size) for p in range(len(positions) // page_size + 1)]
+    assert all(len(page) == page_size for page in pages[:-1]) and len(pages[-1]) < page_size
+    rows = pd.concat(pages)
+    assert rows.index.tolist() == positions.tolist()
+    assert rows["amount"].tolist() == amount.iloc[positions].tolist()
+    assert index.query(sort_by=sort_by, descending=descending, **filters) is positions
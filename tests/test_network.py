@@ -0,0 +1,50 @@
+import itertools
+import warnings
+
+import numpy as np
+import pytest
+
+import network
+from network import EDGE_DTYPE, TransferGraph, network_features
+
+
+def _edges(n, m, seed):
+    rng = np.random.default_rng(seed)
+    edges = np.zeros(m, dtype=EDGE_DTYPE)
+    edges["src"], edges["dst"] = rng.integers(0, n, m), rng.integers(0, n, m)
+    edges["paise"] = rng.integers(100, 10**7, m)
+    return edges[edges["src"] != edges["dst"]]
+
+
+def _brute_force(graph, max_length):
+    weight = {(int(s), int(d)): w for s, d, w in zip(graph.src, graph.indices, graph.weights)}
+    cycles = set()
+    for length in range(2, max_length + 1):
+        for nodes in itertools.permutations(range(graph.n), length):
+            hops = list(zip(nodes, nodes[1:] + nodes[:1]))
+            if nodes[0] == min(nodes) and all(hop in weight for hop in hops):
+                cycles.add((nodes, min(weight[hop] for hop in hops)))
+    return cycles
+
+
+@pytest.mark.parametrize("max_length", [2, 3, 4, 5])
+@pytest.mark.parametrize("batch_paths", [1, network.CYCLE_BATCH_PATHS])
+def test_cycles_match_brute_force(monkeypatch, max_length, batch_paths):
+    monkeypatch.setattr(network, "CYCLE_BATCH_PATHS", batch_paths)
+    for seed in range(3):
+        graph = TransferGraph.from_edges(_edges(12, 40, seed), 12)
+        found = {(tuple(nodes), flow) for batch, flows in graph.cycles(max_length)
+                 for nodes, flow in zip(batch.tolist(), flows.tolist())}
+        assert found == _brute_force(graph, max_length)
+
+
+def test_cycle_cap_warns():
+    edges = _edges(200, 1500, 0)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        capped = network_features(edges, 200, max_cycles=10)
+    assert any(issubclass(w.category, RuntimeWarning) for w in caught)
+    assert 0 < capped["cycle_count"].sum() <= 10 * network.MAX_CYCLE_LENGTH
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert network_features(edges, 200)["cycle_count"].sum() > capped["cycle_count"].sum()
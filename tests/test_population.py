@@ -0,0 +1,45 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import POPULATION_COLUMNS, WINDOW_COLUMNS, CohortIndex, ObservationAgent, ReasoningAgent, summary_features
+from synthetic import FRAUD_PATTERNS, generate_statement
+
+DECLARED_SHARES = [0.0, 0.3, 0.8, 1.0, 2.5]
+STRICT = {"underreporting_pct": 15, "inflow_multiple": 1.05, "benford_digit_one": 0.28, "volatility_ratio": 0.05,
+          "window_z": 2.0, "spend_collapse": 0.3, "high_score": 2}
+
+
+def _observed():
+    observer = ObservationAgent()
+    frauds = [()] + [(p,) for p in FRAUD_PATTERNS] + [tuple(FRAUD_PATTERNS)]
+    for seed, fraud in enumerate(frauds):
+        df, declared = generate_statement(800, seed=seed, fraud=fraud)
+        obs = observer.observe_stream(io.StringIO(df.to_csv(index=False)))
+        for share in DECLARED_SHARES:
+            yield declared * share, obs
+
+
+def _population(items):
+    return pd.DataFrame([{"declared_income": declared, **summary_features(obs["summary"]), **obs["window_features"]}
+                         for declared, obs in items], columns=POPULATION_COLUMNS + ["benford_mad"] + WINDOW_COLUMNS)
+
+
+@pytest.mark.parametrize("thresholds", [None, STRICT])
+def test_population_matches_scalar_analyze(thresholds):
+    items = list(_observed())
+    population = _population(items)
+    cohorts = CohortIndex.build(population)
+    reasoner = ReasoningAgent(thresholds, cohorts=cohorts)
+    scored = reasoner.analyze_population(population)
+    for (declared, obs), row in zip(items, scored.to_dict("records")):
+        report = reasoner.analyze(declared, obs)
+        assert row["signal_mask"] == report["signal_mask"], (declared, report["signals"])
+        assert (row["risk_score"], row["risk_level"], row["hypothesis"]) == \
+            (report["risk_score"], report["risk_level"], report["hypothesis"])
+        assert row["mismatch_ratio"] == pytest.approx(report["mismatch_ratio"])
+        assert row["implied_income"] == pytest.approx(report["implied_income"])
+    assert scored["risk_level"].nunique() >= 2
+    assert np.count_nonzero(scored["signal_mask"]) > len(scored) // 2
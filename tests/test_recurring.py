@@ -0,0 +1,79 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+import core
+from core import MerchantMemo, ObservationAgent, ReasoningAgent, description_skeletons, detect_recurring, merchant_keys
+
+RENT_DATES = list(pd.date_range("2024-01-05", periods=12, freq="MS") + pd.Timedelta(days=4))
+
+
+def _rent(one_off_date, one_off=200_000.0):
+    dates = RENT_DATES + [pd.Timestamp(one_off_date)]
+    order = np.argsort(dates, kind="stable")
+    amounts = np.array([15_000.0] * 12 + [one_off])
+    return [dates[i] for i in order], amounts[order]
+
+
+def test_one_off_payment_is_not_part_of_the_stream():
+    dates, amounts = _rent("2024-06-20")
+    streams, mask = detect_recurring(dates, ["RENT PAYMENT"] * 13, amounts, np.full(13, 2))
+    assert len(streams) == 1
+    assert streams["occurrences"].iloc[0] == 12
+    assert streams["total"].iloc[0] == 180_000.0
+    assert mask.sum() == 12 and not mask[amounts == 200_000.0].any()
+
+
+def test_one_off_before_the_first_payment_keeps_the_stream_whole():
+    dates, amounts = _rent("2023-12-20")
+    streams, mask = detect_recurring(dates, ["RENT PAYMENT"] * 13, amounts, np.full(13, 2))
+    assert streams["occurrences"].iloc[0] == 12
+    assert streams["total"].iloc[0] == 180_000.0
+    assert not mask[0] and mask[1:].all()
+
+
+def test_recurring_obligations_leave_out_one_off_payments():
+    dates, amounts = _rent("2024-06-20")
+    frame = pd.DataFrame({"date": [d.strftime("%Y-%m-%d") for d in dates], "description": "RENT PAYMENT",
+                          "amount": amounts, "type": "debit"})
+    frame.loc[len(frame)] = ["2024-01-01", "SALARY", 2_000_000.0, "credit"]
+    observed = ObservationAgent().observe(io.StringIO(frame.to_csv(index=False)))
+    report = ReasoningAgent(obligations="recurring").analyze(600_000.0, observed)
+    assert any("Fixed=180000.0 " in log for log in report["logs"])
+
+
+def test_observe_reuses_canonical_merchant_keys(monkeypatch):
+    memo = MerchantMemo()
+    monkeypatch.setattr(core, "MERCHANT_MEMO", memo)
+    descriptions = ["RENT PAYMENT REF 000123", "NETFLIX.COM 4411", "Swiggy Order 98121"]
+    frame = pd.DataFrame([(day.strftime("%Y-%m-%d"), text, 499.0, "debit") for day in RENT_DATES for text in descriptions],
+                         columns=["date", "description", "amount", "type"])
+    observed = ObservationAgent().observe(io.StringIO(frame.to_csv(index=False)))
+    assert sorted(observed["obligations"]["merchant"]) == ["netflix", "rent", "swiggy"]
+    # Only the descriptions' skeletons were looked up, not the keys they map to.
+    assert set(memo.entries) == set(description_skeletons(descriptions))
+
+
+def test_timezone_aware_dates_are_bucketed_by_local_day():
+    # Paid just after midnight IST on the 1st, i.e. the previous evening in UTC.
+    local = pd.DatetimeIndex(RENT_DATES) - pd.Timedelta(days=4) + pd.Timedelta(minutes=30)
+    dates = local.tz_localize("Asia/Kolkata")
+    streams, mask = detect_recurring(dates, ["RENT PAYMENT"] * 12, np.full(12, 15_000.0), np.full(12, 2))
+    naive, _ = detect_recurring(local, ["RENT PAYMENT"] * 12, np.full(12, 15_000.0), np.full(12, 2))
+    assert mask.all()
+    pd.testing.assert_frame_equal(streams, naive)
+
+
+def test_transfer_beneficiaries_keep_distinct_keys():
+    descriptions = ["NEFT to T000042", "NEFT to T000917", "UPI/DR/412345678901/RAMESH/YESB0000001",
+                    "UPI/DR/998877665544/SURESH/HDFC0000123", "UPI XXXX1234 SWIGGY", "Swiggy Order 4821"]
+    keys = merchant_keys(descriptions, memo=MerchantMemo()).tolist()
+    assert keys == ["t000042", "t000917", "ramesh", "suresh", "swiggy", "swiggy"]
+
+
+def test_payments_to_different_beneficiaries_are_separate_streams():
+    descriptions = ["NEFT to T000042", "NEFT to T000917"]
+    dates = [day for day in RENT_DATES for _ in descriptions]
+    streams, _ = detect_recurring(dates, descriptions * 12, np.tile([20_000.0, 8_000.0], 12), np.full(24, 2))
+    assert sorted(zip(streams["merchant"], streams["total"])) == [("t000042", 240_000.0), ("t000917", 96_000.0)]
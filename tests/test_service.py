@@ -0,0 +1,80 @@
+import asyncio
+import io
+import textwrap
+import time
+from urllib.parse import urlsplit
+
+import pytest
+
+from core import ActionAgent, ObservationAgent, ReasoningAgent
+from service import HttpError, ScoringServer, ScoringService, observe_summary, score_batch
+from synthetic import generate_statement
+
+CASES = [((), 1.0), (("inflated_inflows",), 1.0), (("benford_violation", "lifestyle_gap"), 1.0), ((), 0.4)]
+
+
+def _statements():
+    for seed, (fraud, declared_share) in enumerate(CASES):
+        df, declared = generate_statement(1500, seed=seed, fraud=fraud)
+        yield df.to_csv(index=False).encode(), declared * declared_share
+
+
+def test_batch_explanation_matches_scalar_report():
+    statements = list(_statements())
+    results = score_batch([(declared, observe_summary(data), True) for data, declared in statements])
+    observer, reasoner, actor = ObservationAgent(), ReasoningAgent(), ActionAgent()
+    for (data, declared), result in zip(statements, results):
+        obs = observer.observe(io.BytesIO(data))
+        reasoning = reasoner.analyze(declared, obs)
+        assert result["score"]["risk_score"] == reasoning["risk_score"]
+        assert result["explanation"] == textwrap.dedent(actor.explain(declared, obs, reasoning)).strip()
+        assert "reasoning" not in result
+    assert len({r["explanation"] for r in results}) > 1
+
+
+def test_explain_off_returns_the_score_alone():
+    data, declared = next(_statements())
+    [result] = score_batch([(declared, observe_summary(data), False)])
+    assert "explanation" not in result and result["score"]["risk_level"] == "Low"
+
+
+def test_full_service_answers_503_with_retry_after():
+    data, declared = next(_statements())
+
+    async def run():
+        service = ScoringService(workers=1, max_pending=1)
+        service.start()
+        server = ScoringServer(service)
+        try:
+            first = asyncio.ensure_future(service.score(data, declared))
+            await asyncio.sleep(0)
+            with pytest.raises(HttpError) as rejected:
+                await server.route("POST", urlsplit(f"/score?declared_income={declared}"), {}, data)
+            assert (await first)["score"]["risk_level"] == "Low"
+            return rejected.value, service.metrics()
+        finally:
+            await service.close()
+
+    error, metrics = asyncio.run(run())
+    assert error.status == 503 and error.headers == {"Retry-After": "1"}
+    assert metrics["rejected"] == 1 and metrics["ok"] == 1 and metrics["in_progress"] == 0
+
+
+def test_lone_request_does_not_wait_out_the_batch_window():
+    data, declared = next(_statements())
+
+    async def run():
+        service = ScoringService(workers=1, batch_wait_ms=10_000)
+        service.start()
+        try:
+            await service.score(data, declared)
+            start = time.perf_counter()
+            await service.score(data, declared)
+            return time.perf_counter() - start, service.metrics()
+        finally:
+            await service.close()
+
+    elapsed, metrics = asyncio.run(run())
+    assert elapsed < 5
+    assert metrics["batch_size"]["max"] == 1 and metrics["batch_size"]["window"] == 2
+
@@ -0,0 +1,51 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import ObservationAgent, ReasoningAgent
+from synthetic import generate_statement
+
+
+def _csv(rows, seed, fraud=()):
+    df, declared = generate_statement(rows, seed=seed, fraud=fraud)
+    return df.to_csv(index=False), declared
+
+
+@pytest.mark.parametrize("chunksize", [5, 97, 100_000])
+def test_stream_matches_single_pass_at_any_chunk_boundary(chunksize):
+    observer, reasoner = ObservationAgent(), ReasoningAgent()
+    for seed, fraud in enumerate([(), ("benford_violation",), ("inflated_inflows", "lifestyle_gap")]):
+        csv, declared = _csv(600, seed, fraud)
+        whole = observer.observe(io.StringIO(csv))
+        streamed = observer.observe_stream(io.StringIO(csv), chunksize=chunksize)
+        assert streamed["raw_df"] is None
+        assert streamed["summary"].to_dict() == whole["summary"].to_dict()
+        # Window totals are float sums, so chunking may move the last bit.
+        assert streamed["window_features"] == pytest.approx(whole["window_features"], rel=1e-12)
+        pd.testing.assert_frame_equal(streamed["monthly"], whole["monthly"], check_exact=False, rtol=1e-12)
+        pd.testing.assert_frame_equal(streamed["anomalies"], whole["anomalies"])
+        assert reasoner.analyze(declared, streamed)["risk_score"] == reasoner.analyze(declared, whole)["risk_score"]
+
+
+def test_stream_merges_sub_paise_amounts():
+    rows = 50
+    df = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=rows, freq="D").strftime("%Y-%m-%d"),
+        "description": ["UPI SWIGGY"] * rows,
+        "amount": np.round(np.linspace(10.001, 99.999, rows), 3),
+        "type": ["debit"] * rows,
+    })
+    csv = df.to_csv(index=False)
+    observer = ObservationAgent()
+    whole = observer.observe(io.StringIO(csv))["summary"]
+    streamed = observer.observe_stream(io.StringIO(csv), chunksize=3)["summary"]
+    assert streamed.total_outflow == pytest.approx(whole.total_outflow, abs=1e-9)
+    assert streamed.total_outflow == pytest.approx(df["amount"].sum(), abs=1e-9)
+    np.testing.assert_array_equal(streamed.paise, whole.paise)
+
+
+def test_stream_rejects_missing_columns():
+    observed = ObservationAgent().observe_stream(io.StringIO("date,amount\n2024-01-01,5\n"), chunksize=1)
+    assert "error" in observed
@@ -0,0 +1,23 @@
+import io
+
+import pytest
+
+from core import ObservationAgent, ReasoningAgent
+from synthetic import generate_statement
+
+
+@pytest.mark.parametrize("rows", [200, 5000])
+def test_honest_statements_score_low(rows):
+    observer, reasoner = ObservationAgent(), ReasoningAgent()
+    for seed in range(10):
+        df, declared = generate_statement(rows, seed=seed)
+        report = reasoner.analyze(declared, observer.observe(io.StringIO(df.to_csv(index=False))))
+        assert report["risk_level"] == "Low", (seed, report["signals"])
+
+
+def test_declared_income_is_the_legitimate_inflow():
+    df, declared = generate_statement(1000, seed=3)
+    assert declared == pytest.approx(df.loc[df["type"] == "credit", "amount"].sum(), abs=0.01)
+    inflated, inflated_declared = generate_statement(1000, seed=3, fraud=("inflated_inflows",))
+    assert inflated_declared == declared
+    assert inflated.loc[inflated["type"] == "credit", "amount"].sum() > 1.4 * declared